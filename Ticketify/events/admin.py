@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import UserProfile, Category, Event, Booking, Ticket, Review, MovieShowTime
+from .models import UserProfile, Category, Event, Booking, Ticket, Review, MovieShowTime, SalesRollup, ExportJob, ShowTimeTemplate, SeatMap, InventoryShard
 
 
 @admin.register(UserProfile)
@@ -23,7 +23,8 @@ class EventAdmin(admin.ModelAdmin):
     search_fields = ['title', 'description', 'venue', 'city']
     prepopulated_fields = {'slug': ('title',)}
     date_hierarchy = 'event_date'
-    readonly_fields = ['created_at', 'updated_at']
+    # Ticket counters are maintained by inventory_service (see Event.save)
+    readonly_fields = ['created_at', 'updated_at', 'inventory_shards', 'available_tickets', 'held_tickets']
     
     def get_fieldsets(self, request, obj=None):
         """Return different fieldsets based on event type"""
@@ -36,7 +37,11 @@ class EventAdmin(admin.ModelAdmin):
                     'fields': ('venue', 'address', 'city', 'event_date', 'start_time')
                 }),
                 ('Pricing & Capacity', {
-                    'fields': ('price', 'total_tickets', 'available_tickets')
+                    'fields': ('price', 'total_tickets', 'available_tickets', 'held_tickets', 'seat_map')
+                }),
+                ('Waiting Room', {
+                    'fields': ('waiting_room_rate', 'waiting_room_opens_at', 'inventory_shards'),
+                    'classes': ('collapse',)
                 }),
                 ('Media', {
                     'fields': ('image',)
@@ -55,7 +60,11 @@ class EventAdmin(admin.ModelAdmin):
                     'fields': ('venue', 'address', 'city', 'event_date', 'start_time')
                 }),
                 ('Pricing & Capacity', {
-                    'fields': ('price', 'total_tickets', 'available_tickets')
+                    'fields': ('price', 'total_tickets', 'available_tickets', 'held_tickets', 'seat_map')
+                }),
+                ('Waiting Room', {
+                    'fields': ('waiting_room_rate', 'waiting_room_opens_at', 'inventory_shards'),
+                    'classes': ('collapse',)
                 }),
                 ('Media', {
                     'fields': ('image',)
@@ -83,7 +92,7 @@ class MovieShowTimeInline(admin.TabularInline):
 
 @admin.register(MovieShowTime)
 class MovieShowTimeAdmin(admin.ModelAdmin):
-    list_display = ['event', 'show_date', 'start_time', 'end_time', 'available_tickets']
+    list_display = ['event', 'show_date', 'start_time', 'end_time', 'available_tickets', 'held_tickets']
     list_filter = ['show_date', 'event']
     search_fields = ['event__title']
     date_hierarchy = 'show_date'
@@ -97,7 +106,7 @@ class MovieShowTimeAdmin(admin.ModelAdmin):
             'fields': ('start_time', 'end_time')
         }),
         ('Capacity', {
-            'fields': ('available_tickets',)
+            'fields': ('available_tickets', 'held_tickets')
         }),
     )
     
@@ -107,6 +116,24 @@ class MovieShowTimeAdmin(admin.ModelAdmin):
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 
+@admin.register(ShowTimeTemplate)
+class ShowTimeTemplateAdmin(admin.ModelAdmin):
+    list_display = ['__str__', 'event', 'venue', 'start_time', 'end_time', 'is_active']
+    list_filter = ['is_active', 'venue']
+    search_fields = ['event__title', 'venue']
+    
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == 'event':
+            kwargs['queryset'] = Event.objects.filter(event_type='movie')
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+@admin.register(SeatMap)
+class SeatMapAdmin(admin.ModelAdmin):
+    list_display = ['name', 'venue', 'capacity', 'updated_at']
+    search_fields = ['name', 'venue']
+
+
 @admin.register(Booking)
 class BookingAdmin(admin.ModelAdmin):
     list_display = ['booking_id', 'user', 'event', 'show_time', 'quantity', 'total_amount', 'status', 'created_at']
@@ -117,7 +144,7 @@ class BookingAdmin(admin.ModelAdmin):
     
     fieldsets = (
         ('Booking Information', {
-            'fields': ('booking_id', 'user', 'event', 'show_time', 'status')
+            'fields': ('booking_id', 'user', 'event', 'show_time', 'status', 'expires_at')
         }),
         ('Details', {
             'fields': ('quantity', 'total_amount', 'email', 'phone')
@@ -144,3 +171,25 @@ class ReviewAdmin(admin.ModelAdmin):
     list_filter = ['rating', 'created_at']
     search_fields = ['event__title', 'user__username', 'comment']
     date_hierarchy = 'created_at'
+
+
+@admin.register(SalesRollup)
+class SalesRollupAdmin(admin.ModelAdmin):
+    list_display = ['event', 'granularity', 'bucket_start', 'tickets_sold', 'revenue', 'cancellations', 'scans']
+    list_filter = ['granularity']
+    search_fields = ['event__title']
+    date_hierarchy = 'bucket_start'
+
+
+@admin.register(ExportJob)
+class ExportJobAdmin(admin.ModelAdmin):
+    list_display = ['event', 'requested_by', 'file_format', 'status', 'row_count', 'created_at', 'finished_at']
+    list_filter = ['status', 'file_format']
+    search_fields = ['event__title', 'requested_by__username']
+    readonly_fields = ['created_at', 'finished_at']
+
+
+@admin.register(InventoryShard)
+class InventoryShardAdmin(admin.ModelAdmin):
+    list_display = ['event', 'shard', 'available_tickets', 'held_tickets']
+    search_fields = ['event__title']
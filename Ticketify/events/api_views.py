@@ -2,13 +2,20 @@ from django.shortcuts import get_object_or_404
 from django.utils import timezone
 from django.conf import settings
 from django.core.cache import cache
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
 from rest_framework.views import APIView
+from rest_framework.generics import ListAPIView, RetrieveAPIView
+from rest_framework.pagination import CursorPagination, PageNumberPagination
 from rest_framework.response import Response
 from rest_framework import status, permissions
 
-from .serializers import QRValidateSerializer
-from .models import Ticket, TicketScanLog
+from .serializers import QRValidateSerializer, SalesSeriesQuerySerializer, EventSerializer
+from .models import Event, Ticket, TicketScanLog
 from .services.qr_service import verify_token, make_token, generate_qr_base64
+from .services import analytics_service, catalogue_service
+from datetime import datetime, time, timedelta
 import hmac
 import hashlib
 import json
@@ -101,3 +108,144 @@ class QRGenerateAPIView(APIView):
         expires_in = settings.QR_REFRESH_INTERVAL
 
         return Response({'image_base64': img_b64, 'token': token, 'expires_in': expires_in})
+
+
+class OrganizerSalesAPIView(APIView):
+    """Sales-over-time series for an organizer's events, served from rollups"""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request, slug=None):
+        query = SalesSeriesQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        params = query.validated_data
+
+        events = Event.objects.filter(organizer=request.user)
+        if slug:
+            events = events.filter(slug=slug)
+            if not events.exists():
+                return Response({'detail': 'Not found.'}, status=status.HTTP_404_NOT_FOUND)
+
+        tz = timezone.get_current_timezone()
+        start = timezone.make_aware(datetime.combine(params['start'], time.min), tz)
+        end = timezone.make_aware(datetime.combine(params['end'] + timedelta(days=1), time.min), tz)
+        series = analytics_service.sales_series(events, start, end, params['granularity'])
+
+        return Response({
+            'granularity': params['granularity'],
+            'start': params['start'],
+            'end': params['end'],
+            'series': [
+                {
+                    'bucket': timezone.localtime(row['bucket_start']).isoformat(),
+                    'tickets_sold': row['tickets_sold'],
+                    'revenue': str(row['revenue']),
+                    'cancellations': row['cancellations'],
+                    'scans': row['scans'],
+                }
+                for row in series
+            ],
+        })
+
+
+class EventCursorPagination(CursorPagination):
+    """Cursor pages in the order picked by the `sort` query param"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        return catalogue_service.CURSOR_ORDERINGS[catalogue_service.sort_key(request.query_params)]
+
+
+class EventPagePagination(PageNumberPagination):
+    """Numbered pages for the `popular` sort, whose live ranking cannot back a cursor"""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class ConditionalGetMixin:
+    """Strong ETag / Last-Modified validators and shared cache headers.
+
+    Anonymous, cookie-free responses so a CDN may cache and revalidate them.
+    """
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def conditional_response(self, request, etag_source, last_modified):
+        etag = '"%s"' % hashlib.sha256(etag_source.encode('utf-8')).hexdigest()[:32]
+        timestamp = int(last_modified.timestamp()) if last_modified else None
+        self.validators = (etag, timestamp)
+        return get_conditional_response(request, etag=etag, last_modified=timestamp)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag, timestamp = getattr(self, 'validators', (None, None))
+        if etag and response.status_code in (200, 304):
+            response['ETag'] = etag
+            if timestamp:
+                response['Last-Modified'] = http_date(timestamp)
+            patch_cache_control(response, public=True, max_age=settings.EVENTS_API_MAX_AGE)
+        return response
+
+
+class SelectableFieldsMixin:
+    """Pass `?fields=a,b` through to the serializer"""
+
+    def get_serializer(self, *args, **kwargs):
+        fields = self.request.query_params.get('fields')
+        if fields:
+            kwargs['fields'] = [name.strip() for name in fields.split(',')]
+        return super().get_serializer(*args, **kwargs)
+
+
+class EventListAPIView(ConditionalGetMixin, SelectableFieldsMixin, ListAPIView):
+    """Published events with the events page filters, `fields` selection and cursor pages"""
+    serializer_class = EventSerializer
+
+    @property
+    def pagination_class(self):
+        if catalogue_service.sort_key(self.request.query_params) == 'popular':
+            return EventPagePagination
+        return EventCursorPagination
+
+    def get_queryset(self):
+        events = Event.objects.filter(status='published').select_related('category')
+        sort_by = catalogue_service.sort_key(self.request.query_params)
+        if sort_by == 'popular':
+            return catalogue_service.sort_events(events, sort_by)
+        return catalogue_service.with_sort_at(events)
+
+    def filter_queryset(self, queryset):
+        return catalogue_service.filter_events(queryset, self.request.query_params)
+
+    def list(self, request, *args, **kwargs):
+        # Any change to a matching event bumps its updated_at (or the count),
+        # and renaming a category bumps the category's
+        stamp = self.filter_queryset(Event.objects.filter(status='published')).aggregate(
+            event_modified=Max('updated_at'), category_modified=Max('category__updated_at'), count=Count('id')
+        )
+        last_modified = max(filter(None, [stamp['event_modified'], stamp['category_modified']]), default=None)
+        source = f"{request.get_full_path()}|{stamp['count']}|{stamp['event_modified']}|{stamp['category_modified']}"
+        not_modified = self.conditional_response(request, source, last_modified)
+        if not_modified is not None:
+            return not_modified
+        return super().list(request, *args, **kwargs)
+
+
+class EventDetailAPIView(ConditionalGetMixin, SelectableFieldsMixin, RetrieveAPIView):
+    """A single published event"""
+    serializer_class = EventSerializer
+    lookup_field = 'slug'
+
+    def get_queryset(self):
+        return Event.objects.filter(status='published').select_related('category')
+
+    def retrieve(self, request, *args, **kwargs):
+        event = self.get_object()
+        category_modified = event.category.updated_at if event.category else None
+        source = f"{request.get_full_path()}|{event.updated_at}|{event.category.name if event.category else ''}"
+        not_modified = self.conditional_response(request, source, max(filter(None, [event.updated_at, category_modified])))
+        if not_modified is not None:
+            return not_modified
+        return Response(self.get_serializer(event).data)
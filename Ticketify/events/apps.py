@@ -7,3 +7,19 @@ class EventsConfig(AppConfig):
     
     def ready(self):
         import events.signals
+        
+        from django.conf import settings
+        from .shared_cache import require_shared
+        require_shared()
+
+        if settings.HOLD_SWEEPER_INTERVAL:
+            from .services import hold_service
+            hold_service.start_sweeper(settings.HOLD_SWEEPER_INTERVAL)
+
+        from django.db.backends.signals import connection_created
+        if settings.REQUEST_PROFILING:
+            from .profiling import install_query_timer
+            connection_created.connect(install_query_timer, dispatch_uid='events.profiling')
+        if settings.SLOW_QUERY_LOG:
+            from .slow_queries import install_slow_query_log
+            connection_created.connect(install_slow_query_log, dispatch_uid='events.slow_queries')
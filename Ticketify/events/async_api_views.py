@@ -0,0 +1,162 @@
+"""Async versions of the QR API views for ASGI deployments.
+
+Same requests and responses as `QRValidateAPIView` / `QRGenerateAPIView`,
+but a scan waiting on the database or cache yields the event loop instead
+of holding a worker thread. Mounted in place of the DRF views when
+`QR_API_ASYNC` is on (the default under `asgi.py`).
+
+Django 4.2's `csrf_exempt` and `require_*` decorators do not support async
+views, so the attribute and method checks are done by hand. Credentials go
+through DRF's configured authenticators like on the sync views: Basic auth
+works, and a request carrying a session must pass the CSRF check.
+"""
+import asyncio
+import contextvars
+import hmac
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from .models import Ticket, TicketScanLog
+from .serializers import QRValidateSerializer
+from .services import qr_service
+
+
+def _detail(message, status, **extra):
+    return JsonResponse({'detail': message, **extra}, status=status)
+
+
+def _method_not_allowed(request):
+    return _detail(f'Method "{request.method}" not allowed.', 405)
+
+
+def _authenticate(request):
+    """(user, error response) from DRF's default authenticators, as an APIView would"""
+    authenticators = [auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    drf_request = Request(request, authenticators=authenticators)
+    try:
+        return drf_request.user, None
+    except exceptions.APIException as exc:
+        response = _detail(str(exc.detail), exc.status_code)
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            header = authenticators[0].authenticate_header(drf_request) if authenticators else None
+            if header:
+                response['WWW-Authenticate'] = header
+            else:
+                response.status_code = 403
+        return None, response
+
+
+async def qr_validate(request):
+    """Validate a scanned QR token and mark the ticket used"""
+    if request.method != 'POST':
+        return _method_not_allowed(request)
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return _detail('JSON parse error', 400)
+    # After reading the body: the CSRF check parses form posts
+    _, error = await sync_to_async(_authenticate)(request)
+    if error is not None:
+        return error
+    serializer = QRValidateSerializer(data=data)
+    if not serializer.is_valid():
+        return JsonResponse(serializer.errors, status=400)
+    token = serializer.validated_data['token']
+    device_info = serializer.validated_data.get('device_info', '')
+    remote_addr = request.META.get('REMOTE_ADDR')
+
+    try:
+        payload, sig = qr_service.verify_token(token)
+        ticket_id = payload.get('ticket_id')
+        event_id = payload.get('event_id')
+        ts = int(payload.get('ts'))
+    except (ValueError, TypeError):
+        return _detail('Invalid token format', 400)
+
+    # Basic rate limiting per ticket + IP
+    rate_key = f'qr_rate:{ticket_id}:{remote_addr}'
+    attempts = await cache.aget(rate_key) or 0
+    if attempts >= 10:
+        return _detail('Too many attempts', 429)
+    if attempts:
+        await cache.aincr(rate_key)
+    else:
+        await cache.aset(rate_key, 1, timeout=60)
+
+    try:
+        ticket = await Ticket.objects.select_related('event').aget(ticket_id=ticket_id)
+    except Ticket.DoesNotExist:
+        return _detail('Not found.', 404)
+
+    async def reject(note, message):
+        await TicketScanLog.objects.acreate(
+            ticket=ticket, success=False, remote_addr=remote_addr, device_info=device_info, notes=note
+        )
+        return _detail(message, 400)
+
+    if str(ticket.event.id) != str(event_id):
+        return await reject('Event mismatch', 'Event mismatch')
+    if not hmac.compare_digest(qr_service.expected_signature(ticket, ts), sig):
+        return await reject('Bad signature', 'Invalid signature')
+
+    window = settings.QR_REFRESH_INTERVAL + settings.QR_LEEWAY_SECONDS
+    if abs(int(timezone.now().timestamp()) - ts) > window:
+        return await reject('Token expired', 'Token expired')
+    if ticket.qr_status == 'USED' or ticket.status == 'used':
+        return await reject('Already used', 'Ticket already used')
+
+    # Prevent duplicate scans in same window
+    cache_key = f'qr_scanned:{ticket.ticket_id}:{ts}'
+    if await cache.aget(cache_key):
+        return await reject('Duplicate scan window', 'Duplicate scan detected')
+
+    ticket.qr_status = 'USED'
+    ticket.validated_at = timezone.now()
+    ticket.validated_by = None
+    await ticket.asave(update_fields=['qr_status', 'validated_at', 'validated_by'])
+
+    await cache.aset(cache_key, True, timeout=window)
+    await TicketScanLog.objects.acreate(
+        ticket=ticket, success=True, remote_addr=remote_addr, device_info=device_info, notes='Validated'
+    )
+    return JsonResponse({'detail': 'Ticket validated', 'ticket_id': ticket.ticket_id})
+
+
+# As with APIView.as_view(): scanners post without cookies, and requests that
+# do carry a session are CSRF-checked by SessionAuthentication in _authenticate
+qr_validate.csrf_exempt = True
+
+
+async def qr_generate(request, ticket_id):
+    """Fresh QR token and PNG (base64) for one of the user's tickets"""
+    if request.method != 'GET':
+        return _method_not_allowed(request)
+    # The session user is loaded lazily through sync code
+    user, error = await sync_to_async(_authenticate)(request)
+    if error is not None:
+        return error
+    if not user.is_authenticated:
+        return _detail('Authentication credentials were not provided.', 403)
+
+    try:
+        ticket = await Ticket.objects.select_related('event').aget(ticket_id=ticket_id, user=user)
+    except Ticket.DoesNotExist:
+        return _detail('Not found.', 404)
+
+    token = await qr_service.amake_token(ticket)
+    # PNG encoding is CPU work; keep it off the event loop (in this request's context, so it is profiled)
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    img_b64 = await loop.run_in_executor(
+        qr_service.encode_executor(), context.run, qr_service.generate_qr_base64, token
+    )
+
+    return JsonResponse({'image_base64': img_b64, 'token': token, 'expires_in': settings.QR_REFRESH_INTERVAL})
@@ -0,0 +1,120 @@
+"""Read-replica routing for catalogue pages.
+
+Only views marked with `@replica_reads` may read from a replica, and only
+for the catalogue models below; everything else (bookings, tickets,
+inventory, QR validation, sessions and users) stays on the primary. A
+client that has just written is pinned to the primary for
+`REPLICA_PIN_SECONDS` so it sees its own booking or review despite replica
+lag.
+"""
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+
+PIN_COOKIE = 'db_primary_until'
+
+REPLICA_MODELS = {'events.category', 'events.event', 'events.movieshowtime', 'events.review', 'events.seatmap'}
+
+
+class RoutingState:
+    """Per-request routing decisions"""
+
+    def __init__(self, replica_reads=False):
+        self.replica_reads = replica_reads
+        self.wrote = False
+
+
+_state = ContextVar('db_routing_state', default=None)
+
+
+def replica_reads(view_func):
+    """Allow a read-only view to serve catalogue queries from a replica"""
+    view_func.replica_reads = True
+    return view_func
+
+
+def pinned_to_primary(request):
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class PrimaryReplicaRouter:
+    """Send allowed catalogue reads to a random replica"""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or not state.replica_reads or state.wrote:
+            return None
+        if model._meta.label_lower not in REPLICA_MODELS or not settings.DATABASE_REPLICAS:
+            return None
+        # Reads inside a transaction must see its writes
+        if connections['default'].in_atomic_block:
+            return None
+        return random.choice(settings.DATABASE_REPLICAS)
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
+
+
+class ReplicaRoutingMiddleware:
+    """Enable replica reads for marked views and pin clients after writes"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._pin(request, state, response)
+
+    async def __acall__(self, request):
+        state = RoutingState()
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._pin(request, state, response)
+
+    def _pin(self, request, state, response):
+        if settings.DATABASE_REPLICAS and (state.wrote or request.method not in ('GET', 'HEAD', 'OPTIONS')):
+            pin = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(PIN_COOKIE, str(int(time.time()) + pin), max_age=pin, httponly=True, samesite='Lax')
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        state = _state.get()
+        if (
+            state is not None
+            and getattr(view_func, 'replica_reads', False)
+            and request.method in ('GET', 'HEAD')
+            and not pinned_to_primary(request)
+        ):
+            state.replica_reads = True
@@ -1,7 +1,9 @@
 from django import forms
 from django.contrib.auth.forms import UserCreationForm, AuthenticationForm
 from django.contrib.auth.models import User
+from django.utils import timezone
 from .models import Event, Booking, Review, UserProfile, MovieShowTime
+from .services import seat_service
 
 
 class UserRegistrationForm(UserCreationForm):
@@ -77,7 +79,7 @@ class EventForm(forms.ModelForm):
         model = Event
         fields = ['title', 'slug', 'description', 'category', 'event_type', 'venue', 'address', 
               'city', 'event_date', 'start_time', 'price', 'total_tickets', 
-                  'image', 'status', 'is_featured']
+                  'seat_map', 'image', 'status', 'is_featured']
         widgets = {
             'title': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Event Title'}),
             'slug': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'event-slug'}),
@@ -91,6 +93,7 @@ class EventForm(forms.ModelForm):
             'start_time': forms.TimeInput(attrs={'class': 'form-control', 'type': 'time'}),
             'price': forms.NumberInput(attrs={'class': 'form-control', 'placeholder': '0.00', 'step': '0.01'}),
             'total_tickets': forms.NumberInput(attrs={'class': 'form-control', 'placeholder': 'Number of Tickets'}),
+            'seat_map': forms.Select(attrs={'class': 'form-control'}),
             'image': forms.FileInput(attrs={'class': 'form-control'}),
             'status': forms.Select(attrs={'class': 'form-control'}),
             'is_featured': forms.CheckboxInput(attrs={'class': 'form-check-input'}),
@@ -106,6 +109,14 @@ class EventForm(forms.ModelForm):
 
 class BookingForm(forms.ModelForm):
     """Form for booking tickets"""
+    selected_seats = forms.CharField(required=False, widget=forms.TextInput(attrs={
+        'class': 'form-control',
+        'placeholder': 'Comma separated seats e.g., A1,A2'
+    }))
+    seat_zone = forms.ChoiceField(required=False, widget=forms.Select(attrs={'class': 'form-control'}),
+                                  help_text='Leave seats empty to get the best available seats in this zone')
+    # Sent back unchanged on retries so a double submit cannot book twice
+    idempotency_key = forms.CharField(required=False, widget=forms.HiddenInput)
     
     class Meta:
         model = Booking
@@ -125,7 +136,6 @@ class BookingForm(forms.ModelForm):
                 'placeholder': 'Phone Number'
             }),
             'show_time': forms.Select(attrs={'class': 'form-control'}),
-            'selected_seats': forms.TextInput(attrs={'class': 'form-control', 'placeholder': 'Comma separated seats e.g., A1,A2'})
         }
     
     def __init__(self, event=None, *args, **kwargs):
@@ -136,13 +146,42 @@ class BookingForm(forms.ModelForm):
             self.fields['quantity'].widget.attrs['max'] = event.available_tickets
             # If movie, populate show_time choices for this event
             if event.event_type == 'movie':
-                self.fields['show_time'].queryset = MovieShowTime.objects.filter(event=event, show_date=event.event_date)
+                # Show times are scheduled ahead of time; only list those still to come
+                first_date = max(event.event_date, timezone.localdate()) if event.event_date else timezone.localdate()
+                self.fields['show_time'].queryset = MovieShowTime.objects.filter(event=event, show_date__gte=first_date)
+                self.fields['show_time'].label_from_instance = lambda st: f"{st.show_date.strftime('%a, %d %b')} · {st}"
                 self.fields['show_time'].required = True
                 self.fields['selected_seats'].required = False
             else:
                 # non-movie events don't use show_time
                 self.fields['show_time'].queryset = MovieShowTime.objects.none()
                 self.fields['show_time'].required = False
+            
+            if event.seat_map_id:
+                self.fields['seat_zone'].choices = [('', 'Any zone')] + [
+                    (zone, zone.title()) for zone in seat_service.zones(event.seat_map)
+                ]
+            else:
+                del self.fields['seat_zone']
+    
+    def clean_selected_seats(self):
+        """Return the selected seats as a list of labels"""
+        raw = self.cleaned_data.get('selected_seats') or ''
+        seats = [s.strip().upper() for s in raw.split(',') if s.strip()]
+        if seats and self.event and self.event.seat_map_id:
+            try:
+                seat_service.parse_seats(self.event.seat_map, seats)
+            except seat_service.SeatUnavailable as exc:
+                raise forms.ValidationError(str(exc))
+        return seats
+    
+    def clean(self):
+        cleaned_data = super().clean()
+        seats = cleaned_data.get('selected_seats')
+        quantity = cleaned_data.get('quantity')
+        if seats and quantity and self.event and self.event.seat_map_id and len(seats) != quantity:
+            self.add_error('selected_seats', f"Select exactly {quantity} seat{'s' if quantity > 1 else ''}")
+        return cleaned_data
     
     def clean_quantity(self):
         quantity = self.cleaned_data.get('quantity')
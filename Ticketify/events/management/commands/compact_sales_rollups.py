@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from events.services import analytics_service
+
+
+class Command(BaseCommand):
+    help = 'Compact hourly sales rollups into daily resolution (optionally rebuilding them first)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--older-than-days', type=int, default=30,
+                            help='Drop hourly buckets older than this many days (default: 30)')
+        parser.add_argument('--rebuild', action='store_true',
+                            help='Recompute all rollups from bookings and scan logs before compacting')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            buckets = analytics_service.rebuild()
+            self.stdout.write(f'Rebuilt {buckets} rollup buckets')
+
+        removed = analytics_service.compact(older_than_days=options['older_than_days'])
+        self.stdout.write(self.style.SUCCESS(f'Removed {removed} hourly buckets'))
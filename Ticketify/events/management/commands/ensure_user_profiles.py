@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from events.models import UserProfile
+
+
+class Command(BaseCommand):
+    help = 'Bulk-create missing user profiles (e.g. after importing users)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        created = UserProfile.objects.create_missing(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Created {created} profiles'))
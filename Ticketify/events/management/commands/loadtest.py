@@ -0,0 +1,374 @@
+import base64
+import http.client
+import json
+import logging
+import os
+import random
+import secrets
+import string
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from decimal import Decimal
+from urllib.parse import urlencode, urlsplit
+
+from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+from django.contrib.auth.models import User
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand, CommandError
+from django.core.servers.basehttp import ThreadedWSGIServer, WSGIRequestHandler, get_internal_wsgi_application
+from django.db import connection
+from django.urls import reverse
+from django.utils import timezone
+
+from events.models import Booking, Event, Ticket
+from events.services import qr_service
+
+SCENARIOS = ['onsale', 'browse', 'qr-refresh', 'gate']
+
+# Booking form errors shown when too few tickets are left
+SOLD_OUT_MARKERS = (b'tickets are left', b'tickets available')
+
+
+def is_test_database(settings_dict):
+    """Whether the database looks like a test or scratch database (in-memory or named test*)"""
+    name = str(settings_dict['NAME'])
+    return name == ':memory:' or name.startswith('file:memorydb') or os.path.basename(name).startswith('test')
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+class ScenarioStats:
+    """Latencies and outcome counts for one scenario, shared by client threads"""
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.outcomes = Counter()
+        self.elapsed = 0.0
+        # Correctness checks reported after the numbers (non-zero counts are failures)
+        self.checks = {}
+        self._lock = threading.Lock()
+
+    def record(self, outcome, latency):
+        with self._lock:
+            self.latencies.append(latency)
+            self.outcomes[outcome] += 1
+
+    def percentile(self, p):
+        ordered = sorted(self.latencies)
+        if not ordered:
+            return 0.0
+        return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-test on-sale, browsing, QR refresh and gate-ingress traffic and report throughput, '
+        'latency percentiles and oversell/error counts. Creates its own throwaway events, users '
+        'and tickets in the configured database, so it only runs against a test database '
+        'unless --allow-non-test-database is given.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', help='Base URL of a running server using this database '
+                                          '(default: start a threaded server in this process)')
+        parser.add_argument('--scenario', action='append', choices=SCENARIOS, dest='scenarios',
+                            help='Scenario to run; repeat for several (default: all)')
+        parser.add_argument('--concurrency', type=int, default=20, help='Concurrent clients (default: 20)')
+        parser.add_argument('--buyers', type=int, default=200, help='Buyers in the flash on-sale (default: 200)')
+        parser.add_argument('--stock', type=int, default=100, help='Tickets on sale (default: 100)')
+        parser.add_argument('--quantity', type=int, default=1, help='Tickets per booking (default: 1)')
+        parser.add_argument('--browse-requests', type=int, default=500,
+                            help='Anonymous catalogue requests (default: 500)')
+        parser.add_argument('--attendees', type=int, default=50,
+                            help='Ticket holders polling QR codes and entering the gate (default: 50)')
+        parser.add_argument('--polls', type=int, default=5, help='QR refreshes per attendee (default: 5)')
+        parser.add_argument('--duplicate-rate', type=float, default=0.2,
+                            help='Share of gate scans that replay an already scanned token (default: 0.2)')
+        parser.add_argument('--forgery-rate', type=float, default=0.1,
+                            help='Share of gate scans with a forged signature (default: 0.1)')
+        parser.add_argument('--keep', action='store_true', help='Keep the load-test data afterwards')
+        parser.add_argument('--allow-non-test-database', action='store_true',
+                            help='Run even though the configured database is not a test database')
+
+    def handle(self, *args, **options):
+        if not options['allow_non_test_database'] and not is_test_database(connection.settings_dict):
+            raise CommandError(
+                f'Refusing to load-test database "{connection.settings_dict["NAME"]}": it does not look like '
+                'a test database. Pass --allow-non-test-database to run anyway.'
+            )
+        scenarios = options['scenarios'] or SCENARIOS
+        self.concurrency = max(1, options['concurrency'])
+        self.run_id = secrets.token_hex(3)
+        self.options = options
+
+        server = None
+        if options['url']:
+            parts = urlsplit(options['url'])
+            if parts.scheme != 'http' or not parts.hostname:
+                raise CommandError('--url must be an http:// URL')
+            self.host, self.port = parts.hostname, parts.port or 80
+        else:
+            server = ThreadedWSGIServer(('127.0.0.1', 0), QuietRequestHandler, allow_reuse_address=False)
+            server.set_app(get_internal_wsgi_application())
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            # Rejected scans are expected; keep 4xx warnings out of the report
+            logging.getLogger('django.request').setLevel(logging.ERROR)
+            self.host, self.port = server.server_address[:2]
+        self.stdout.write(f'Load test {self.run_id} against http://{self.host}:{self.port}, {self.concurrency} clients')
+
+        self.sessions = []
+        try:
+            self._create_fixture(options)
+            for name in scenarios:
+                stats = getattr(self, f'_run_{name.replace("-", "_")}')()
+                self._report(stats)
+        finally:
+            if server is not None:
+                server.shutdown()
+                server.server_close()
+            if not options['keep']:
+                self._cleanup()
+
+    # Fixture
+
+    def _create_fixture(self, options):
+        prefix = f'loadtest-{self.run_id}'
+        organizer = User.objects.create(username=f'{prefix}-organizer')
+        event_date = timezone.localdate() + timedelta(days=30)
+        self.onsale_event = Event.objects.create(
+            title=f'Load test on-sale {self.run_id}', slug=f'{prefix}-onsale', description='Load test',
+            organizer=organizer, venue='Load Hall', address='1 Test St', city='Test City',
+            event_date=event_date, price=Decimal('10.00'), total_tickets=options['stock'], status='published',
+        )
+        self.gate_event = Event.objects.create(
+            title=f'Load test gate {self.run_id}', slug=f'{prefix}-gate', description='Load test',
+            organizer=organizer, venue='Load Hall', address='1 Test St', city='Test City',
+            event_date=event_date, price=Decimal('10.00'), total_tickets=max(1, options['attendees']),
+            status='published',
+        )
+
+        self.buyers = self._create_users(f'{prefix}-buyer', options['buyers'])
+        attendees = self._create_users(f'{prefix}-attendee', options['attendees'])
+        bookings = Booking.objects.bulk_create(
+            Booking(
+                booking_id=f'LT{secrets.token_hex(6).upper()}', user=user, event=self.gate_event, quantity=1,
+                total_amount=Decimal('10.00'), email=user.email, phone='555-0100', status='confirmed',
+            )
+            for user, _ in attendees
+        )
+        # Created in bulk without printed QR images (named only, so saves don't render one)
+        ticket_ids = [f'LT{secrets.token_hex(8).upper()}' for _ in bookings]
+        tickets = Ticket.objects.bulk_create(
+            Ticket(
+                ticket_id=ticket_id, verification_code=secrets.token_hex(16),
+                booking=booking, event=self.gate_event, user=booking.user,
+                attendee_name=booking.user.username, attendee_email=booking.email,
+                qr_code=f'qrcodes/{qr_service.ticket_qr_filename(ticket_id)}',
+            )
+            for ticket_id, booking in zip(ticket_ids, bookings)
+        )
+        self.attendees = [(ticket, session) for ticket, (_, session) in zip(tickets, attendees)]
+
+    def _create_users(self, prefix, count):
+        users = User.objects.bulk_create(
+            User(username=f'{prefix}-{i}', email=f'{prefix}-{i}@example.com') for i in range(count)
+        )
+        return [(user, self._login(user)) for user in users]
+
+    def _login(self, user):
+        """Session cookie for the user, created directly instead of posting the login form"""
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = 'events.backends.ProfileModelBackend'
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        self.sessions.append(session.session_key)
+        return session.session_key
+
+    def _cleanup(self):
+        prefix = f'loadtest-{self.run_id}-'
+        # Tickets booked during the on-sale got real QR images
+        for name in Ticket.objects.filter(event__slug=f'{prefix}onsale').exclude(qr_code='').values_list('qr_code', flat=True):
+            default_storage.delete(name)
+        Event.objects.filter(slug__startswith=prefix).delete()
+        User.objects.filter(username__startswith=prefix).delete()
+        Session.objects.filter(session_key__in=self.sessions).delete()
+
+    # HTTP
+
+    def _request(self, method, path, body=None, headers=None):
+        """(status, Location header, body, seconds); status 0 on connection errors"""
+        connection = http.client.HTTPConnection(self.host, self.port, timeout=60)
+        started = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers or {})
+            response = connection.getresponse()
+            data = response.read()
+            return response.status, response.getheader('Location', ''), data, time.perf_counter() - started
+        except (OSError, http.client.HTTPException):
+            return 0, '', b'', time.perf_counter() - started
+        finally:
+            connection.close()
+
+    def _run(self, name, jobs):
+        """Run `jobs` (callables taking the stats) on the client pool"""
+        stats = ScenarioStats(name)
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for future in [pool.submit(job, stats) for job in jobs]:
+                future.result()
+        stats.elapsed = time.perf_counter() - started
+        return stats
+
+    # Scenarios
+
+    def _run_onsale(self):
+        """Every buyer submits the booking form for the same event at once"""
+        path = reverse('book_ticket', kwargs={'slug': self.onsale_event.slug})
+        quantity = str(self.options['quantity'])
+
+        def buy(session_key, stats):
+            csrf = ''.join(random.choices(string.ascii_letters + string.digits, k=32))
+            body = urlencode({
+                'csrfmiddlewaretoken': csrf, 'quantity': quantity,
+                'email': 'buyer@example.com', 'phone': '555-0100', 'idempotency_key': secrets.token_hex(16),
+            })
+            status, location, page, latency = self._request('POST', path, body, {
+                'Content-Type': 'application/x-www-form-urlencoded',
+                'Cookie': f'sessionid={session_key}; csrftoken={csrf}',
+            })
+            stats.record(self._booking_outcome(status, location, page), latency)
+
+        stats = self._run('onsale', [lambda s, key=key: buy(key, s) for _, key in self.buyers])
+        booked = sum(
+            Booking.objects.filter(event=self.onsale_event, status__in=['pending', 'confirmed'])
+            .values_list('quantity', flat=True)
+        )
+        stats.checks = {
+            'tickets booked': f'{booked} of {self.onsale_event.total_tickets}',
+            'oversold': max(0, booked - self.onsale_event.total_tickets),
+        }
+        return stats
+
+    def _booking_outcome(self, status, location, page):
+        """Classify a booking form response by where it redirects or what the page says"""
+        if status == 302:
+            target = urlsplit(location).path
+            if target.startswith('/booking/'):
+                return 'booked'
+            if target == reverse('event_detail', kwargs={'slug': self.onsale_event.slug}):
+                # The event sold out before the form was processed
+                return 'sold_out'
+            if target == reverse('my_bookings'):
+                # The queued write timed out and may still commit
+                return 'pending'
+        elif status == 200 and any(marker in page for marker in SOLD_OUT_MARKERS):
+            return 'sold_out'
+        return f'error_{status}'
+
+    def _run_browse(self):
+        """Anonymous catalogue traffic: listing, detail, category and API pages"""
+        paths = [
+            reverse('home'),
+            reverse('events_list'),
+            reverse('events_list') + '?sort=popular',
+            reverse('events_list') + '?date=upcoming',
+            reverse('event_detail', kwargs={'slug': self.onsale_event.slug}),
+            reverse('categories'),
+            reverse('api_event_list'),
+            reverse('api_event_detail', kwargs={'slug': self.onsale_event.slug}),
+        ]
+
+        def browse(path, stats):
+            status, _, _, latency = self._request('GET', path)
+            stats.record('ok' if status == 200 else f'error_{status}', latency)
+
+        count = self.options['browse_requests']
+        return self._run('browse', [lambda s, p=random.choice(paths): browse(p, s) for _ in range(count)])
+
+    def _run_qr_refresh(self):
+        """Attendees polling their rotating QR code"""
+
+        def poll(ticket, session_key, stats):
+            path = reverse('api_qr_generate', kwargs={'ticket_id': ticket.ticket_id})
+            status, _, _, latency = self._request('GET', path, headers={'Cookie': f'sessionid={session_key}'})
+            stats.record('ok' if status == 200 else f'error_{status}', latency)
+
+        jobs = [
+            lambda s, t=ticket, k=key: poll(t, k, s)
+            for ticket, key in self.attendees for _ in range(self.options['polls'])
+        ]
+        return self._run('qr-refresh', jobs)
+
+    def _run_gate(self):
+        """Gate scanners: one genuine scan per ticket plus replayed and forged tokens"""
+        path = reverse('api_qr_validate')
+        scans = []
+        tokens = {}
+        for ticket, _ in self.attendees:
+            tokens[ticket.pk] = qr_service.make_token(ticket)
+            scans.append(('genuine', ticket.pk, tokens[ticket.pk]))
+        genuine = list(scans)
+        for _ in range(int(len(genuine) * self.options['duplicate_rate'])):
+            scans.append(('duplicate',) + random.choice(genuine)[1:])
+        for _ in range(int(len(genuine) * self.options['forgery_rate'])):
+            _, ticket_pk, token = random.choice(genuine)
+            payload, _ = qr_service.verify_token(token)
+            forged = base64.urlsafe_b64encode(
+                f"{json.dumps(payload, separators=(',', ':'))}|{secrets.token_hex(32)}".encode('utf-8')
+            ).decode('utf-8')
+            scans.append(('forged', ticket_pk, forged))
+        random.shuffle(scans)
+
+        admitted = Counter()
+        lock = threading.Lock()
+
+        def scan(kind, ticket_pk, token, stats):
+            body = json.dumps({'token': token, 'device_info': 'loadtest'})
+            status, _, _, latency = self._request('POST', path, body, {'Content-Type': 'application/json'})
+            if status == 200:
+                with lock:
+                    admitted[(kind == 'forged', ticket_pk)] += 1
+                outcome = 'forgery_admitted' if kind == 'forged' else 'admitted'
+            elif status in (400, 429):
+                outcome = f'{kind}_rejected'
+            else:
+                outcome = f'error_{status}'
+            stats.record(outcome, latency)
+
+        stats = self._run('gate', [lambda s, scan_args=args: scan(*scan_args, s) for args in scans])
+        genuine_admissions = [admitted[(False, ticket.pk)] for ticket, _ in self.attendees]
+        stats.checks = {
+            'tickets admitted twice': sum(1 for count in genuine_admissions if count > 1),
+            'genuine tickets refused': sum(1 for count in genuine_admissions if count == 0),
+            'forgeries admitted': sum(count for (forged, _), count in admitted.items() if forged),
+        }
+        return stats
+
+    # Report
+
+    def _report(self, stats):
+        total = sum(stats.outcomes.values())
+        rate = total / stats.elapsed if stats.elapsed else 0
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{stats.name}'))
+        self.stdout.write(f'  {total} requests in {stats.elapsed:.2f}s ({rate:.1f} req/s)')
+        self.stdout.write(
+            '  latency ms: ' + ', '.join(
+                f'p{p} {stats.percentile(p) * 1000:.1f}' for p in (50, 90, 95, 99)
+            ) + f', max {max(stats.latencies, default=0) * 1000:.1f}'
+        )
+        self.stdout.write('  outcomes: ' + ', '.join(f'{k} {v}' for k, v in sorted(stats.outcomes.items())))
+        errors = sum(v for k, v in stats.outcomes.items() if k.startswith('error'))
+        self.stdout.write((self.style.ERROR if errors else self.style.SUCCESS)(f'  errors: {errors}'))
+        for label, value in stats.checks.items():
+            style = self.style.ERROR if isinstance(value, int) and value else self.style.SUCCESS
+            self.stdout.write(style(f'  {label}: {value}'))
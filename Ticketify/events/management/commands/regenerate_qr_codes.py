@@ -0,0 +1,89 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage, default_storage
+from django.core.management.base import BaseCommand, CommandError
+
+from events.models import Ticket
+from events.services import qr_service
+
+
+class Command(BaseCommand):
+    help = 'Re-render every ticket QR image in parallel worker processes (resumable)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help='Worker processes rendering images (default: CPU count)')
+        parser.add_argument('--chunk-size', type=int, default=2000,
+                            help='Tickets read, rendered and saved per round (default: 2000)')
+        parser.add_argument('--checkpoint', default=os.path.join(settings.BASE_DIR, '.qr_regeneration.checkpoint'),
+                            help='File recording the last finished ticket id')
+        parser.add_argument('--restart', action='store_true',
+                            help='Ignore the checkpoint and start from the first ticket')
+
+    def handle(self, *args, **options):
+        if not isinstance(default_storage, FileSystemStorage):
+            raise CommandError('Parallel regeneration writes to local media storage only')
+        workers = max(1, options['workers'])
+        chunk_size = max(1, options['chunk_size'])
+        checkpoint = options['checkpoint']
+
+        upload_to = Ticket._meta.get_field('qr_code').upload_to
+        directory = default_storage.path(upload_to)
+        os.makedirs(directory, exist_ok=True)
+
+        last_id = 0 if options['restart'] else self._read_checkpoint(checkpoint)
+        if last_id:
+            self.stdout.write(f'Resuming after ticket id {last_id}')
+
+        done = 0
+        started = time.monotonic()
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            while True:
+                # Keyset pagination: each round is one indexed range scan
+                rows = list(
+                    Ticket.objects.filter(pk__gt=last_id).order_by('pk')
+                    .values_list('pk', 'ticket_id', 'verification_code', 'event_id')[:chunk_size]
+                )
+                if not rows:
+                    break
+
+                batch = -(-len(rows) // workers)
+                futures = [
+                    pool.submit(qr_service.write_ticket_qr_batch, rows[i:i + batch], directory)
+                    for i in range(0, len(rows), batch)
+                ]
+                tickets = [
+                    Ticket(pk=pk, qr_code=f'{upload_to}{name}')
+                    for future in futures for pk, name in future.result()
+                ]
+                Ticket.objects.bulk_update(tickets, ['qr_code'], batch_size=500)
+
+                last_id = rows[-1][0]
+                self._write_checkpoint(checkpoint, last_id)
+                done += len(rows)
+                elapsed = time.monotonic() - started
+                self.stdout.write(f'{done} tickets regenerated ({done / elapsed:.0f}/s), last id {last_id}')
+
+        if os.path.exists(checkpoint):
+            os.remove(checkpoint)
+        elapsed = time.monotonic() - started
+        rate = done / elapsed if elapsed else 0
+        self.stdout.write(self.style.SUCCESS(f'Regenerated {done} QR codes in {elapsed:.1f}s ({rate:.0f}/s)'))
+
+    def _read_checkpoint(self, path):
+        try:
+            with open(path) as fh:
+                return int(fh.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+        except ValueError:
+            raise CommandError(f'Unreadable checkpoint {path}; use --restart')
+
+    def _write_checkpoint(self, path, last_id):
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as fh:
+            fh.write(str(last_id))
+        os.replace(tmp_path, path)
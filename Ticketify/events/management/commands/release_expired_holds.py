@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from events.services import hold_service
+
+
+class Command(BaseCommand):
+    help = 'Cancel pending bookings whose hold has expired and return their tickets and seats'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500,
+                            help='Holds released per transaction (default: 500)')
+        parser.add_argument('--loop', action='store_true',
+                            help='Keep sweeping instead of exiting after one pass')
+        parser.add_argument('--interval', type=int, default=30,
+                            help='Seconds between sweeps with --loop (default: 30)')
+
+    def handle(self, *args, **options):
+        if options['loop']:
+            self.stdout.write(f"Sweeping expired holds every {options['interval']}s (Ctrl+C to stop)")
+            try:
+                hold_service.run_sweeper(options['interval'], batch_size=options['batch_size'])
+            except KeyboardInterrupt:
+                pass
+            return
+
+        released = hold_service.release_expired_holds(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Released {released} expired holds'))
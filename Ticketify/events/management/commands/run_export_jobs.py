@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from events.services import export_service
+
+
+class Command(BaseCommand):
+    help = 'Run pending attendee export jobs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=10,
+                            help='Maximum number of jobs to run in this invocation (default: 10)')
+
+    def handle(self, *args, **options):
+        requeued = export_service.recover_stale_jobs()
+        if requeued:
+            self.stdout.write(f'Requeued {len(requeued)} timed out export jobs')
+        processed = 0
+        for job in export_service.claim_export_jobs(options['limit']):
+            export_service.execute_export_job(job)
+            processed += 1
+            self.stdout.write(f'Export {job.pk} ({job.event.title}): {job.status}, {job.row_count} rows')
+        self.stdout.write(self.style.SUCCESS(f'Processed {processed} export jobs'))
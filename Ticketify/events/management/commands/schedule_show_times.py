@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from events.services import showtime_service
+
+
+class Command(BaseCommand):
+    help = 'Materialize movie show times for the next N days from show time templates'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7,
+                            help='Number of days ahead to schedule, starting today (default: 7)')
+
+    def handle(self, *args, **options):
+        submitted = showtime_service.materialize(days=options['days'])
+        self.stdout.write(self.style.SUCCESS(f'Scheduled up to {submitted} show times'))
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from events.models import Event
+from events.services import inventory_service
+
+
+class Command(BaseCommand):
+    help = "Split a hot event's ticket counters over N shard rows (0 merges them back)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('slug', help='Event slug')
+        parser.add_argument('--shards', type=int, required=True,
+                            help='Number of counter shards (0 = single counter)')
+
+    def handle(self, *args, **options):
+        event = Event.objects.filter(slug=options['slug']).first()
+        if not event:
+            raise CommandError(f"No event with slug {options['slug']!r}")
+        if not 0 <= options['shards'] <= 256:
+            raise CommandError('--shards must be between 0 and 256')
+
+        inventory_service.shard_event(event, options['shards'])
+        if options['shards']:
+            self.stdout.write(self.style.SUCCESS(f"{event.title}: counters split over {options['shards']} shards"))
+        else:
+            self.stdout.write(self.style.SUCCESS(f'{event.title}: counters merged back into the event'))
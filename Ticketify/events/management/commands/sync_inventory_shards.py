@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from events.models import Event
+from events.services import inventory_service
+
+
+class Command(BaseCommand):
+    help = 'Refresh the ticket counters shown on sharded events from their shard totals'
+
+    def handle(self, *args, **options):
+        events = Event.objects.filter(inventory_shards__gt=0).only('id')
+        count = 0
+        for event in events.iterator():
+            inventory_service.sync_shards(event)
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Synced {count} sharded events'))
@@ -0,0 +1,45 @@
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from events.models import Event
+from events.services import waiting_room_service
+
+
+class Command(BaseCommand):
+    help = 'Open or close the waiting room for an event on sale'
+
+    def add_arguments(self, parser):
+        parser.add_argument('slug', help='Event slug')
+        group = parser.add_mutually_exclusive_group(required=True)
+        group.add_argument('--open', type=int, metavar='RATE', dest='rate',
+                           help='Open the waiting room, admitting RATE buyers per minute')
+        group.add_argument('--close', action='store_true', help='Close the waiting room')
+
+    def handle(self, *args, **options):
+        event = Event.objects.filter(slug=options['slug']).first()
+        if not event:
+            raise CommandError(f"No event with slug {options['slug']!r}")
+
+        if options['close']:
+            event.waiting_room_rate = None
+            event.waiting_room_opens_at = None
+        else:
+            if options['rate'] < 1:
+                raise CommandError('RATE must be at least 1')
+            event.waiting_room_rate = options['rate']
+            event.waiting_room_opens_at = timezone.now()
+        # The same checks as the admin and event form (a shared cache, ...)
+        try:
+            event.clean()
+        except ValidationError as exc:
+            raise CommandError(' '.join(exc.messages))
+        event.save(update_fields=['waiting_room_rate', 'waiting_room_opens_at', 'updated_at'])
+        waiting_room_service.forget_room_state(event.id)
+
+        if options['close']:
+            self.stdout.write(self.style.SUCCESS(f'Waiting room closed for {event.title}'))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Waiting room open for {event.title}: {options['rate']} buyers per minute"
+            ))
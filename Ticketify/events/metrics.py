@@ -0,0 +1,379 @@
+"""Prometheus metrics for on-sale capacity tuning, served at `/metrics`.
+
+Counters and histograms live in process memory. With `METRICS_DIR` set,
+each process also writes its values to `<METRICS_DIR>/<pid>.json` every
+`METRICS_FLUSH_SECONDS`, and `/metrics` adds up the files of all processes,
+so a scrape sees every gunicorn worker whichever one answers it. Files of
+exited processes (recycled workers, pool children, management commands)
+are added into `exited.json` and removed by the next scrape, or by the next
+process that gets the same pid, so counters never go backwards and the
+directory does not grow; clear it when the server is (re)deployed.
+"""
+import atexit
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+KNOWN_METHODS = {'GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'}
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1.0, 2.5, 5.0, 7.5, 10.0)
+EXITED_FILE = 'exited.json'
+LOCK_FILE = '.lock'
+
+
+class Registry:
+    """Metric definitions plus this process's values"""
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self._pid = None
+        self._dirty = False
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        metric.registry = self
+        return metric
+
+    def _check_process(self):
+        """Start over in a forked child and compact a dead process's file for this pid"""
+        pid = os.getpid()
+        if self._pid == pid:
+            return
+        self._pid = pid
+        for metric in self.metrics.values():
+            metric.values.clear()
+        directory = settings.METRICS_DIR
+        if directory:
+            if os.path.exists(os.path.join(directory, f'{pid}.json')):
+                with _locked(directory, fcntl.LOCK_EX):
+                    self._compact(directory, pid)
+            threading.Thread(target=self._flush_loop, args=(pid,), name='metrics-flush', daemon=True).start()
+            atexit.register(self._flush_at_exit, pid)
+
+    def update(self, metric, key, change):
+        with self.lock:
+            self._check_process()
+            metric.values[key] = change(metric.values.get(key))
+            self._dirty = True
+
+    def snapshot(self):
+        with self.lock:
+            self._check_process()
+            return {name: dict(metric.values) for name, metric in self.metrics.items()}
+
+    def flush(self):
+        """Write this process's values for the other workers' scrapes"""
+        directory = settings.METRICS_DIR
+        if not directory:
+            return
+        with self.lock:
+            self._dirty = False
+        snapshot = self.snapshot()
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as fh:
+            json.dump(snapshot, fh)
+        os.replace(tmp_path, path)
+
+    def _flush_loop(self, pid):
+        while os.getpid() == pid:
+            time.sleep(settings.METRICS_FLUSH_SECONDS)
+            if self._dirty:
+                self.flush()
+
+    def _flush_at_exit(self, pid):
+        # Registered before a fork is inherited by the child; only the owner flushes
+        if os.getpid() == pid and self._dirty:
+            self.flush()
+
+    def _add(self, totals, values):
+        for metric_name, series in values.items():
+            metric = self.metrics.get(metric_name)
+            if metric is not None:
+                target = totals.setdefault(metric_name, {})
+                for key, value in series.items():
+                    target[key] = metric.merge(target.get(key), value)
+
+    def _compact(self, directory, pid):
+        """Add an exited process's file into the exited totals (under the exclusive lock)"""
+        path = os.path.join(directory, f'{pid}.json')
+        if not os.path.exists(path):
+            return
+        exited_path = os.path.join(directory, EXITED_FILE)
+        totals = _read(exited_path)
+        self._add(totals, _read(path))
+        tmp_path = f'{exited_path}.tmp'
+        with open(tmp_path, 'w') as fh:
+            json.dump(totals, fh)
+        os.replace(tmp_path, exited_path)
+        os.remove(path)
+
+    def collect(self):
+        """Values of all processes added together"""
+        totals = self.snapshot()
+        directory = settings.METRICS_DIR
+        if directory and os.path.isdir(directory):
+            own = f'{os.getpid()}.json'
+            pids = [int(name[:-5]) for name in os.listdir(directory) if name.endswith('.json') and name[:-5].isdigit()]
+            exited = [pid for pid in pids if not _alive(pid)]
+            if exited:
+                with _locked(directory, fcntl.LOCK_EX):
+                    for pid in exited:
+                        self._compact(directory, pid)
+            # Shared lock: a compaction must not be seen half done (counted twice)
+            with _locked(directory, fcntl.LOCK_SH):
+                for name in os.listdir(directory):
+                    if name.endswith('.json') and name != own:
+                        self._add(totals, _read(os.path.join(directory, name)))
+        return totals
+
+    def exposition(self):
+        """All metrics in the Prometheus text format"""
+        totals = self.collect()
+        lines = []
+        for name, metric in self.metrics.items():
+            lines.append(f'# HELP {name} {metric.documentation}')
+            lines.append(f'# TYPE {name} {metric.kind}')
+            for key, value in sorted(totals[name].items()):
+                lines.extend(metric.samples(dict(zip(metric.labelnames, json.loads(key))), value))
+        return '\n'.join(lines) + '\n'
+
+
+def _read(path):
+    try:
+        with open(path) as fh:
+            return json.load(fh)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def _alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+@contextmanager
+def _locked(directory, operation):
+    with open(os.path.join(directory, LOCK_FILE), 'a') as fh:
+        fcntl.flock(fh, operation)
+        yield
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.registry = None
+
+    def _key(self, labels):
+        return json.dumps([str(labels[name]) for name in self.labelnames])
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if settings.METRICS_ENABLED:
+            self.registry.update(self, self._key(labels), lambda value: (value or 0) + amount)
+
+    def value(self, **labels):
+        """This process's count (for tests and the shell)"""
+        return self.registry.snapshot()[self.name].get(self._key(labels), 0)
+
+    def merge(self, value, other):
+        return (value or 0) + other
+
+    def samples(self, labels, value):
+        return [f'{self.name}{_format_labels(labels)} {_format_value(value)}']
+
+
+class Histogram(Metric):
+    """Stored as per-bucket counts followed by the sum of observations"""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets) + (float('inf'),)
+
+    def observe(self, amount, **labels):
+        if not settings.METRICS_ENABLED:
+            return
+        index = next(i for i, bound in enumerate(self.buckets) if amount <= bound)
+
+        def change(value):
+            value = list(value or [0] * (len(self.buckets) + 1))
+            value[index] += 1
+            value[-1] += amount
+            return value
+        self.registry.update(self, self._key(labels), change)
+
+    def count(self, **labels):
+        """Observations in this process (for tests and the shell)"""
+        value = self.registry.snapshot()[self.name].get(self._key(labels))
+        return sum(value[:-1]) if value else 0
+
+    def merge(self, value, other):
+        if value is None:
+            return list(other)
+        return [a + b for a, b in zip(value, other)]
+
+    def samples(self, labels, value):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, value):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{_format_labels({**labels, "le": _format_value(bound)})} {_format_value(cumulative)}')
+        lines.append(f'{self.name}_sum{_format_labels(labels)} {_format_value(value[-1])}')
+        lines.append(f'{self.name}_count{_format_labels(labels)} {_format_value(cumulative)}')
+        return lines
+
+
+registry = Registry()
+
+# Site-wide totals: a per-event label would add a series for every event ever
+# sold (per-event sales are in the SalesRollup tables)
+BOOKINGS = registry.register(Counter(
+    'ticketify_bookings_total', 'Confirmed bookings',
+))
+TICKETS_SOLD = registry.register(Counter(
+    'ticketify_tickets_sold_total', 'Tickets sold',
+))
+INVENTORY_OPERATIONS = registry.register(Counter(
+    'ticketify_inventory_operations_total',
+    'Inventory counter updates by operation (reserve, commit, release) and result', ['operation', 'result'],
+))
+INVENTORY_REBALANCES = registry.register(Counter(
+    'ticketify_inventory_rebalances_total', 'Sharded inventory rebalances by result', ['result'],
+))
+QR_GENERATIONS = registry.register(Counter(
+    'ticketify_qr_generations_total', 'QR codes issued: rotating tokens and printed ticket images', ['kind'],
+))
+QR_VALIDATIONS = registry.register(Counter(
+    'ticketify_qr_validations_total', 'Ticket scans by outcome (as logged to the scan log)', ['outcome'],
+))
+CACHE_REQUESTS = registry.register(Counter(
+    'ticketify_cache_requests_total', 'Cache lookups by key prefix and result (hit or miss)', ['prefix', 'result'],
+))
+REQUEST_DURATION = registry.register(Histogram(
+    'ticketify_request_duration_seconds', 'Response time per view', ['view', 'method', 'status'],
+))
+
+
+def outcome_label(note):
+    """'Duplicate scan window' -> 'duplicate_scan_window'"""
+    return '_'.join((note or '').lower().split()) or 'unknown'
+
+
+def key_prefix(key):
+    """Bounded label for a cache key: 'qr_rate:TK1:10.0.0.1' -> 'qr_rate'"""
+    prefix, sep, _ = str(key).partition(':')
+    if sep and len(prefix) <= 32 and prefix.replace('_', '').isalnum():
+        return prefix
+    return 'other'
+
+
+class InstrumentedCache:
+    """Cache backend wrapper counting hits and misses of the wrapped backend.
+
+    Configured as `{'BACKEND': 'events.metrics.InstrumentedCache', 'WRAPPED': {...}}`.
+    """
+
+    _missing = object()
+
+    def __init__(self, location, params):
+        wrapped = params['WRAPPED']
+        self._cache = import_string(wrapped['BACKEND'])(wrapped.get('LOCATION', ''), wrapped)
+
+    def __getattr__(self, name):
+        return getattr(self._cache, name)
+
+    def __contains__(self, key):
+        return self._cache.has_key(key)
+
+    def _count(self, key, hit):
+        CACHE_REQUESTS.inc(prefix=key_prefix(key), result='hit' if hit else 'miss')
+
+    def get(self, key, default=None, version=None):
+        value = self._cache.get(key, self._missing, version=version)
+        self._count(key, value is not self._missing)
+        return default if value is self._missing else value
+
+    async def aget(self, key, default=None, version=None):
+        value = await self._cache.aget(key, self._missing, version=version)
+        self._count(key, value is not self._missing)
+        return default if value is self._missing else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = self._cache.get_many(keys, version=version)
+        for key in keys:
+            self._count(key, key in found)
+        return found
+
+
+class MetricsMiddleware:
+    """Record the response time of every request by view"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        self._observe(request, response, started)
+        return response
+
+    async def __acall__(self, request):
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        self._observe(request, response, started)
+        return response
+
+    def _observe(self, request, response, started):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.view_name or match._func_path) if match else 'unmatched'
+        method = request.method if request.method in KNOWN_METHODS else 'other'
+        REQUEST_DURATION.observe(
+            time.perf_counter() - started, view=view, method=method, status=response.status_code,
+        )
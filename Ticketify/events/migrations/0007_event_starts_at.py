@@ -0,0 +1,34 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:41
+
+from datetime import datetime, time
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def backfill_starts_at(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    events = list(Event.objects.exclude(event_date=None).only('id', 'event_date', 'start_time'))
+    for event in events:
+        event.starts_at = timezone.make_aware(datetime.combine(event.event_date, event.start_time or time.min))
+    Event.objects.bulk_update(events, ['starts_at'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0006_export_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='starts_at',
+            field=models.DateTimeField(blank=True, db_index=True, editable=False, null=True),
+        ),
+        migrations.RunPython(backfill_starts_at, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['status', 'starts_at'], name='events_even_status_5c3d55_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:43
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0007_event_starts_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShowTimeTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('venue', models.CharField(blank=True, help_text='Applies to all movies at this venue when no event is set', max_length=300)),
+                ('start_time', models.TimeField()),
+                ('end_time', models.TimeField()),
+                ('is_active', models.BooleanField(default=True)),
+                ('event', models.ForeignKey(blank=True, limit_choices_to={'event_type': 'movie'}, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='show_time_templates', to='events.event')),
+            ],
+            options={
+                'verbose_name': 'Show Time Template',
+                'verbose_name_plural': 'Show Time Templates',
+                'ordering': ['venue', 'start_time'],
+                'indexes': [models.Index(fields=['venue'], name='events_show_venue_fb20f5_idx')],
+            },
+        ),
+    ]
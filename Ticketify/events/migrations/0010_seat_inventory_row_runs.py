@@ -0,0 +1,18 @@
+# Generated by Django 4.2.30 on 2026-10-19 03:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0009_seat_maps'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='seatinventory',
+            name='row_runs',
+            field=models.JSONField(default=list),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0013_inventory_shards'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='exportjob',
+            name='events_expo_status_81ddf0_idx',
+        ),
+        migrations.AddIndex(
+            model_name='exportjob',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['created_at'], name='exportjob_pending_idx'),
+        ),
+    ]
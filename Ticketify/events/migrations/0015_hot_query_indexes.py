@@ -0,0 +1,77 @@
+# Generated by Django 4.2.30 on 2026-10-19 04:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0014_exportjob_pending_index'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='events_book_booking_d4c58e_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='booking',
+            name='events_book_user_id_fa6916_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='event',
+            name='events_even_slug_30eb0f_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='event',
+            name='events_even_status_fcd052_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='ticket',
+            name='events_tick_ticket__955ffb_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='ticket',
+            name='events_tick_verific_ab2304_idx',
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'created_at'], name='booking_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['event', 'created_at'], name='booking_event_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['event', 'status'], name='booking_event_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['status', 'event_date', 'start_time'], name='event_listing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('is_featured', True)), fields=['status', 'event_date', 'start_time'], name='event_featured_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(condition=models.Q(('status', 'published')), fields=['category', 'event_date', 'start_time'], name='event_category_listing_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='event',
+            index=models.Index(fields=['organizer', 'event_date', 'start_time'], name='event_organizer_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['user', 'created_at'], name='ticket_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticket',
+            index=models.Index(fields=['user', 'event', 'status'], name='ticket_user_event_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='ticketscanlog',
+            index=models.Index(fields=['scanned_at'], name='scanlog_recent_idx'),
+        ),
+    ]
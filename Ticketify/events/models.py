@@ -1,14 +1,45 @@
 from django.db import models
+from django.db.models import Case, Q, Value, When
 from django.contrib.auth.models import User
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator, MaxValueValidator
 from django.utils import timezone
-from datetime import datetime
-import qrcode
-from io import BytesIO
-from django.core.files import File
-from PIL import Image
+from datetime import datetime, time
+from django.core.files.base import ContentFile
 import uuid
 
+from . import shared_cache
+from .services import qr_service
+
+
+class UserProfileManager(models.Manager):
+    def for_user(self, user):
+        """Return the user's profile, creating it lazily if it is missing.
+
+        The profile is cached on the user instance, so repeated lookups within
+        a request cost nothing after the first.
+        """
+        try:
+            return user.profile
+        except UserProfile.DoesNotExist:
+            profile, _ = self.get_or_create(user=user)
+            user.profile = profile
+            return profile
+
+    def create_missing(self, batch_size=1000):
+        """Bulk-create profiles for users that don't have one (e.g. imported users)"""
+        user_ids = User.objects.filter(profile__isnull=True).values_list('id', flat=True)
+        created = 0
+        batch = []
+        for user_id in user_ids.iterator(chunk_size=batch_size):
+            batch.append(self.model(user_id=user_id))
+            if len(batch) >= batch_size:
+                created += len(self.bulk_create(batch, ignore_conflicts=True))
+                batch = []
+        if batch:
+            created += len(self.bulk_create(batch, ignore_conflicts=True))
+        return created
+
 
 class UserProfile(models.Model):
     """Extended user profile with additional information"""
@@ -18,6 +49,8 @@ class UserProfile(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = UserProfileManager()
+    
     def __str__(self):
         return f"{self.user.username}'s Profile"
 
@@ -28,6 +61,8 @@ class Category(models.Model):
     description = models.TextField(blank=True)
     icon = models.CharField(max_length=50, default='🎪')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Part of the events API validators: a rename changes every listed event
+    updated_at = models.DateTimeField(auto_now=True)
     
     class Meta:
         verbose_name_plural = 'Categories'
@@ -37,6 +72,108 @@ class Category(models.Model):
         return self.name
 
 
+class SeatMap(models.Model):
+    """Venue seating layout.
+
+    `layout` is a list of rows, e.g. [{"row": "A", "seats": 20, "zone": "premium"}, ...].
+    Seats are labelled by row and number ("A1" .. "A20") and numbered
+    consecutively across rows to index the per-show seat bitmaps.
+    """
+    name = models.CharField(max_length=200)
+    venue = models.CharField(max_length=300, blank=True)
+    layout = models.JSONField(default=list)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['venue', 'name']
+    
+    def __str__(self):
+        return f"{self.name} ({self.venue})" if self.venue else self.name
+    
+    def clean(self):
+        """Validate the layout and keep it fixed once seats are sold against it.
+
+        Seat bitmaps store seats by position in the layout, so adding,
+        removing or resizing rows would move every later seat.
+        """
+        if not isinstance(self.layout, list) or not self.layout:
+            raise ValidationError({'layout': 'Layout must be a non-empty list of rows.'})
+        labels = set()
+        for number, row in enumerate(self.layout, 1):
+            label = str(row.get('row', '')).upper() if isinstance(row, dict) else ''
+            if not label.isascii() or not label.isalpha():
+                raise ValidationError({'layout': f'Row {number} needs a "row" label made of letters (e.g. "A").'})
+            if label in labels:
+                raise ValidationError({'layout': f'Row {label} appears more than once.'})
+            labels.add(label)
+            seats = row.get('seats')
+            if isinstance(seats, bool) or not isinstance(seats, int) or seats < 1:
+                raise ValidationError({'layout': f'Row {label} needs a positive whole number of "seats".'})
+            if not isinstance(row.get('zone', ''), str):
+                raise ValidationError({'layout': f'The "zone" of row {label} must be text.'})
+        
+        if self.pk and SeatInventory.objects.filter(event__seat_map=self).exists():
+            stored = SeatMap.objects.filter(pk=self.pk).values_list('layout', flat=True).first()
+            if stored != self.layout:
+                raise ValidationError({
+                    'layout': 'Seats have already been sold or held on this seat map, so its layout '
+                              'can no longer change. Create a new seat map instead.'
+                })
+    
+    @property
+    def capacity(self):
+        return sum(int(row.get('seats', 0)) for row in self.layout)
+
+
+def event_time_status(prefix='', now=None):
+    """SQL expression classifying an event as upcoming/ongoing/past.
+
+    `prefix` is the lookup path to the event (e.g. 'event__' from Ticket).
+    Upcoming events start after `now`; events that already started today are
+    ongoing, and so are movies dated today, whose show times run through the
+    day. Earlier dates are past. Events without a date are unscheduled.
+    """
+    now = now or timezone.now()
+    today = timezone.localdate(now)
+    return Case(
+        When(**{f'{prefix}starts_at__isnull': True}, then=Value('unscheduled')),
+        When(**{f'{prefix}event_type': 'movie', f'{prefix}event_date': today}, then=Value('ongoing')),
+        When(**{f'{prefix}starts_at__gt': now}, then=Value('upcoming')),
+        When(**{f'{prefix}event_date': today}, then=Value('ongoing')),
+        default=Value('past'),
+        output_field=models.CharField(),
+    )
+
+
+def _started_today(now):
+    """Events of today that have started (see event_time_status); filters on
+    event_date/start_time so the listing indexes apply"""
+    now = timezone.localtime(now or timezone.now())
+    return Q(event_date=now.date()) & (Q(event_type='movie') | Q(start_time__isnull=True) | Q(start_time__lte=now.time()))
+
+
+class EventQuerySet(models.QuerySet):
+    def with_time_status(self, now=None):
+        """Annotate each event with `time_status` computed in SQL"""
+        return self.annotate(time_status=event_time_status(now=now))
+
+    def upcoming(self, now=None):
+        now = timezone.localtime(now or timezone.now())
+        later_today = Q(event_date=now.date(), start_time__gt=now.time()) & ~Q(event_type='movie')
+        return self.filter(Q(event_date__gt=now.date()) | later_today)
+
+    def ongoing(self, now=None):
+        return self.filter(_started_today(now))
+
+    def past(self, now=None):
+        return self.filter(event_date__lt=timezone.localdate(now or timezone.now()))
+
+    def not_past(self, now=None):
+        """Upcoming or ongoing events, i.e. the ones still open for booking"""
+        return self.filter(event_date__gte=timezone.localdate(now or timezone.now()))
+
+
 class Event(models.Model):
     """Event model with comprehensive details"""
     STATUS_CHOICES = [
@@ -59,7 +196,8 @@ class Event(models.Model):
     slug = models.SlugField(max_length=200, unique=True)
     description = models.TextField()
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, related_name='events')
-    organizer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='organized_events')
+    # Indexed by event_organizer_idx
+    organizer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='organized_events', db_index=False)
     
     # Event type
     event_type = models.CharField(max_length=20, choices=EVENT_TYPE_CHOICES, default='other')
@@ -72,11 +210,25 @@ class Event(models.Model):
     # Date and time (single date + optional time)
     event_date = models.DateField(blank=True, null=True)
     start_time = models.TimeField(blank=True, null=True)
+    # event_date + start_time (midnight when no time is set), kept in sync on save
+    starts_at = models.DateTimeField(blank=True, null=True, editable=False)
+    
+    # Assigned seating (optional)
+    seat_map = models.ForeignKey(SeatMap, on_delete=models.SET_NULL, null=True, blank=True, related_name='events')
     
     # Pricing and capacity
     price = models.DecimalField(max_digits=10, decimal_places=2, validators=[MinValueValidator(0)])
     total_tickets = models.PositiveIntegerField(validators=[MinValueValidator(1)])
     available_tickets = models.PositiveIntegerField()
+    # Tickets reserved by pending (unpaid) bookings; already excluded from available_tickets
+    held_tickets = models.PositiveIntegerField(default=0)
+    
+    # Split the ticket counters over this many InventoryShard rows (0 = single counter)
+    inventory_shards = models.PositiveSmallIntegerField(default=0)
+    
+    # Waiting room for high-demand on-sales: buyers admitted per minute (empty = off)
+    waiting_room_rate = models.PositiveIntegerField(null=True, blank=True)
+    waiting_room_opens_at = models.DateTimeField(null=True, blank=True)
     
     # Media
     image = models.ImageField(upload_to='events/', blank=True, null=True)
@@ -92,92 +244,112 @@ class Event(models.Model):
     class Meta:
         ordering = ['-event_date', '-start_time']
         indexes = [
-            models.Index(fields=['status', 'event_date']),
-            models.Index(fields=['slug']),
+            # Listing pages: published events by date, in date/time order
+            models.Index(fields=['status', 'event_date', 'start_time'], name='event_listing_idx'),
+            models.Index(fields=['status', 'event_date', 'start_time'], condition=models.Q(is_featured=True), name='event_featured_idx'),
+            models.Index(
+                fields=['category', 'event_date', 'start_time'],
+                condition=models.Q(status='published'),
+                name='event_category_listing_idx',
+            ),
+            # Organizer dashboard, newest events first
+            models.Index(fields=['organizer', 'event_date', 'start_time'], name='event_organizer_idx'),
         ]
     
+    objects = EventQuerySet.as_manager()
+    
+    COUNTER_FIELDS = ('available_tickets', 'held_tickets')
+    
     def __str__(self):
         return self.title
     
+    def clean(self):
+        # The waiting room's queue positions come from a cache counter that
+        # all workers must share
+        if self.waiting_room_rate and not shared_cache.is_shared():
+            raise ValidationError({
+                'waiting_room_rate': 'Waiting rooms need a cache shared by all server processes; configure REDIS_URL first.'
+            })
+        # Seat bitmaps index the current map's layout (see SeatMap.clean)
+        if self.pk and SeatInventory.objects.filter(event=self).exists():
+            stored = Event.objects.filter(pk=self.pk).values_list('seat_map_id', flat=True).first()
+            if stored != self.seat_map_id:
+                raise ValidationError({
+                    'seat_map': 'Seats have already been sold or held for this event, so its seat map can no longer change.'
+                })
+    
     def save(self, *args, **kwargs):
-        if not self.available_tickets:
-            self.available_tickets = self.total_tickets
+        update_fields = kwargs.get('update_fields')
+        if self._state.adding:
+            if self.available_tickets is None:
+                self.available_tickets = self.total_tickets
+        elif update_fields is None:
+            # The counters only change through inventory_service's conditional
+            # updates; a full save of an instance loaded earlier (edit form,
+            # admin) must not write back its stale copy
+            update_fields = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name not in self.COUNTER_FIELDS
+            ]
+            kwargs['update_fields'] = update_fields
+        self.starts_at = self.compute_starts_at(self.event_date, self.start_time)
+        if update_fields is not None and {'event_date', 'start_time'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'starts_at'}
         super().save(*args, **kwargs)
     
+    @staticmethod
+    def compute_starts_at(event_date, start_time):
+        if not event_date:
+            return None
+        return timezone.make_aware(datetime.combine(event_date, start_time or time.min))
+    
     def create_default_show_times(self, show_date=None):
-        """Create default show times (9 AM, 2 PM, 6 PM, 10 PM) for movie events"""
+        """Create the day's show times for a movie event (see showtime_service)"""
         if self.event_type != 'movie':
             return
         
-        if show_date is None:
-            show_date = self.event_date
-        
+        show_date = show_date or self.event_date
         if not show_date:
             return
         
-        # Default show times: 9 AM, 2 PM, 6 PM, 10 PM
-        default_times = [
-            ('09:00', '12:00'),  # 9 AM - 12 PM (3 hours)
-            ('14:00', '17:00'),  # 2 PM - 5 PM (3 hours)
-            ('18:00', '21:00'),  # 6 PM - 9 PM (3 hours)
-            ('22:00', '01:00'),  # 10 PM - 1 AM (3 hours)
-        ]
-        
-        from datetime import time
-        for start_str, end_str in default_times:
-            start_time = time(*map(int, start_str.split(':')))
-            end_time = time(*map(int, end_str.split(':')))
-            
-            MovieShowTime.objects.get_or_create(
-                event=self,
-                show_date=show_date,
-                start_time=start_time,
-                defaults={'end_time': end_time, 'available_tickets': self.total_tickets}
-            )
+        from .services.showtime_service import schedule_show_times
+        schedule_show_times([self], start_date=show_date, days=1)
     
     @property
     def is_sold_out(self):
         return self.available_tickets <= 0
     
+    def get_time_status(self, now=None):
+        """Return 'upcoming', 'ongoing', 'past' or 'unscheduled'.
+
+        Uses the `time_status` annotation when the queryset provided one
+        (see EventQuerySet.with_time_status), so lists don't recompute it.
+        """
+        if now is None and 'time_status' in self.__dict__:
+            return self.__dict__['time_status']
+        starts_at = self.starts_at or self.compute_starts_at(self.event_date, self.start_time)
+        if starts_at is None:
+            return 'unscheduled'
+        now = now or timezone.now()
+        if self.event_type == 'movie' and self.event_date == timezone.localdate(now):
+            return 'ongoing'
+        if starts_at > now:
+            return 'upcoming'
+        if self.event_date == timezone.localdate(now):
+            return 'ongoing'
+        return 'past'
+    
     @property
     def is_upcoming(self):
-        # Compare date/time if available
-        now = timezone.now()
-        if self.start_time:
-            try:
-                dt = timezone.make_aware(datetime.combine(self.event_date, self.start_time))
-            except Exception:
-                # Fallback: compare dates
-                return self.event_date > now.date()
-            return dt > now
-        return self.event_date > now.date()
+        return self.get_time_status() == 'upcoming'
     
     @property
     def is_ongoing(self):
-        now = timezone.now()
-        # For movie events use show times to determine ongoing; at event level, check date
-        if self.event_type == 'movie':
-            return self.event_date == now.date()
-        if self.start_time:
-            try:
-                dt = timezone.make_aware(datetime.combine(self.event_date, self.start_time))
-            except Exception:
-                return self.event_date == now.date()
-            return dt <= now
-        return self.event_date == now.date()
+        return self.get_time_status() == 'ongoing'
     
     @property
     def is_past(self):
-        now = timezone.now()
-        if self.event_type == 'movie':
-            return self.event_date < now.date()
-        if self.start_time:
-            try:
-                dt = timezone.make_aware(datetime.combine(self.event_date, self.start_time))
-            except Exception:
-                return self.event_date < now.date()
-            return dt < now
-        return self.event_date < now.date()
+        return self.get_time_status() == 'past'
     
     @property
     def tickets_sold(self):
@@ -236,6 +408,7 @@ class MovieShowTime(models.Model):
     start_time = models.TimeField()  # e.g., 09:00
     end_time = models.TimeField()    # e.g., 12:00
     available_tickets = models.PositiveIntegerField(validators=[MinValueValidator(1)])
+    held_tickets = models.PositiveIntegerField(default=0)
     
     class Meta:
         ordering = ['show_date', 'start_time']
@@ -247,6 +420,31 @@ class MovieShowTime(models.Model):
         return f"{self.start_time.strftime('%I:%M %p')} - {self.end_time.strftime('%I:%M %p')} ({self.available_tickets} seats)"
 
 
+class ShowTimeTemplate(models.Model):
+    """Recurring daily show slot used to schedule movie show times.
+
+    Slots can be defined for a single event or for every movie at a venue;
+    event-specific slots take precedence over venue slots.
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, null=True, blank=True, related_name='show_time_templates', limit_choices_to={'event_type': 'movie'})
+    venue = models.CharField(max_length=300, blank=True, help_text='Applies to all movies at this venue when no event is set')
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+    is_active = models.BooleanField(default=True)
+    
+    class Meta:
+        ordering = ['venue', 'start_time']
+        indexes = [
+            models.Index(fields=['venue']),
+        ]
+        verbose_name = 'Show Time Template'
+        verbose_name_plural = 'Show Time Templates'
+    
+    def __str__(self):
+        target = self.event.title if self.event else self.venue
+        return f"{target}: {self.start_time.strftime('%I:%M %p')} - {self.end_time.strftime('%I:%M %p')}"
+
+
 class Booking(models.Model):
     """Booking/Order model for ticket purchases"""
     STATUS_CHOICES = [
@@ -257,7 +455,8 @@ class Booking(models.Model):
     ]
     
     booking_id = models.CharField(max_length=20, unique=True, editable=False)
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings')
+    # Indexed by booking_user_recent_idx
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='bookings', db_index=False)
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='bookings')
     
     # For movie events, which show time is booked
@@ -271,6 +470,9 @@ class Booking(models.Model):
     # Selected seats for this booking (list of seat identifiers)
     selected_seats = models.JSONField(blank=True, null=True)
     
+    # Pending bookings hold inventory until this time, then the sweeper releases it
+    expires_at = models.DateTimeField(null=True, blank=True)
+    
     # Contact information
     email = models.EmailField()
     phone = models.CharField(max_length=15)
@@ -282,8 +484,10 @@ class Booking(models.Model):
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['booking_id']),
-            models.Index(fields=['user', 'status']),
+            models.Index(fields=['user', 'created_at'], name='booking_user_recent_idx'),
+            models.Index(fields=['event', 'created_at'], name='booking_event_recent_idx'),
+            models.Index(fields=['event', 'status'], name='booking_event_status_idx'),
+            models.Index(fields=['expires_at'], condition=models.Q(status='pending'), name='booking_pending_expiry_idx'),
         ]
     
     def __str__(self):
@@ -299,6 +503,17 @@ class Booking(models.Model):
     def generate_booking_id(self):
         """Generate unique booking ID"""
         return f"BK{timezone.now().strftime('%Y%m%d')}{uuid.uuid4().hex[:6].upper()}"
+    
+    @property
+    def is_hold_active(self):
+        """Pending booking whose inventory hold has not expired yet"""
+        return self.status == 'pending' and self.expires_at is not None and self.expires_at > timezone.now()
+
+
+class TicketQuerySet(models.QuerySet):
+    def with_event_time_status(self, now=None):
+        """Annotate each ticket with its event's `event_time_status` computed in SQL"""
+        return self.annotate(event_time_status=event_time_status('event__', now=now))
 
 
 class Ticket(models.Model):
@@ -312,7 +527,8 @@ class Ticket(models.Model):
     ticket_id = models.CharField(max_length=20, unique=True, editable=False)
     booking = models.ForeignKey(Booking, on_delete=models.CASCADE, related_name='tickets')
     event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='tickets')
-    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tickets')
+    # Indexed by ticket_user_recent_idx
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='tickets', db_index=False)
     
     # Ticket details
     attendee_name = models.CharField(max_length=200)
@@ -344,11 +560,14 @@ class Ticket(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    objects = TicketQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
-            models.Index(fields=['ticket_id']),
-            models.Index(fields=['verification_code']),
+            models.Index(fields=['user', 'created_at'], name='ticket_user_recent_idx'),
+            # "Does this user hold a ticket for this event?" (reviews, event page)
+            models.Index(fields=['user', 'event', 'status'], name='ticket_user_event_status_idx'),
         ]
     
     def __str__(self):
@@ -376,27 +595,9 @@ class Ticket(models.Model):
     
     def generate_qr_code(self):
         """Generate QR code for ticket"""
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_H,
-            box_size=10,
-            border=4,
-        )
-        
         # QR code data contains verification code and ticket info
-        qr_data = f"{self.verification_code}|{self.ticket_id}|{self.event.id}"
-        qr.add_data(qr_data)
-        qr.make(fit=True)
-        
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Save to BytesIO
-        buffer = BytesIO()
-        img.save(buffer, format='PNG')
-        file_name = f'ticket_{self.ticket_id}.png'
-        
-        self.qr_code.save(file_name, File(buffer), save=True)
-        buffer.close()
+        png = qr_service.render_ticket_qr(self.verification_code, self.ticket_id, self.event_id)
+        self.qr_code.save(qr_service.ticket_qr_filename(self.ticket_id), ContentFile(png), save=True)
     
     def mark_as_used(self, validator=None):
         """Mark ticket as used during entry"""
@@ -409,7 +610,59 @@ class Ticket(models.Model):
     @property
     def is_valid(self):
         """Check if ticket is valid for entry"""
-        return self.status == 'valid' and self.event.is_upcoming or self.event.is_ongoing
+        if self.status != 'valid':
+            return False
+        time_status = self.__dict__.get('event_time_status') or self.event.get_time_status()
+        return time_status in ('upcoming', 'ongoing')
+
+
+class SeatInventory(models.Model):
+    """Sold/held seats for one event (or one movie show time) as a bitmap.
+
+    Bit i is set when seat i of the event's seat map is taken. Claims use a
+    compare-and-swap on `version`, so concurrent buyers can never take the
+    same seat and no per-seat rows are needed for large venues.
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='seat_inventories')
+    show_time = models.ForeignKey(MovieShowTime, on_delete=models.CASCADE, null=True, blank=True, related_name='seat_inventories')
+    taken = models.BinaryField(default=bytes)
+    # Longest run of free seats in each row, used to skip full rows when allocating
+    row_runs = models.JSONField(default=list)
+    version = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'show_time'], condition=models.Q(show_time__isnull=False), name='unique_seat_inventory_show_time'),
+            models.UniqueConstraint(fields=['event'], condition=models.Q(show_time__isnull=True), name='unique_seat_inventory_event'),
+        ]
+        verbose_name_plural = 'Seat Inventories'
+    
+    def __str__(self):
+        return f"Seats for {self.event.title}" + (f" @ {self.show_time}" if self.show_time_id else '')
+
+
+class InventoryShard(models.Model):
+    """One slice of a hot event's ticket counters.
+
+    When `Event.inventory_shards` is set, bookings decrement a random shard
+    instead of the single event row, so concurrent buyers rarely wait on
+    the same row lock. The event's own counters are refreshed from the
+    shard totals for display.
+    """
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='inventory_shard_rows')
+    shard = models.PositiveSmallIntegerField()
+    available_tickets = models.PositiveIntegerField(default=0)
+    held_tickets = models.PositiveIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['event', 'shard']
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'shard'], name='unique_inventory_shard'),
+        ]
+    
+    def __str__(self):
+        return f"{self.event.title} shard {self.shard}"
 
 
 class Review(models.Model):
@@ -440,6 +693,78 @@ class TicketScanLog(models.Model):
 
     class Meta:
         ordering = ['-scanned_at']
+        indexes = [
+            models.Index(fields=['scanned_at'], name='scanlog_recent_idx'),
+        ]
 
     def __str__(self):
         return f"Scan {self.ticket.ticket_id} @ {self.scanned_at} - {'OK' if self.success else 'FAIL'}"
+
+
+class SalesRollup(models.Model):
+    """Pre-aggregated per-event sales counters for a single time bucket"""
+    GRANULARITY_CHOICES = [
+        ('hour', 'Hourly'),
+        ('day', 'Daily'),
+    ]
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='sales_rollups')
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    bucket_start = models.DateTimeField()
+
+    # Counters (incremented in place as bookings and scans happen)
+    tickets_sold = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    cancellations = models.PositiveIntegerField(default=0)
+    scans = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ['bucket_start']
+        constraints = [
+            models.UniqueConstraint(fields=['event', 'granularity', 'bucket_start'], name='unique_sales_rollup_bucket'),
+        ]
+        indexes = [
+            models.Index(fields=['granularity', 'bucket_start']),
+        ]
+
+    def __str__(self):
+        return f"{self.event.title} {self.granularity} @ {self.bucket_start}"
+
+
+
+class ExportJob(models.Model):
+    """Background attendee export for events too large to stream inline"""
+    FORMAT_CHOICES = [
+        ('csv', 'CSV'),
+        ('xlsx', 'Excel (XLSX)'),
+    ]
+
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    event = models.ForeignKey(Event, on_delete=models.CASCADE, related_name='export_jobs')
+    requested_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='export_jobs')
+    file_format = models.CharField(max_length=4, choices=FORMAT_CHOICES, default='csv')
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    file = models.FileField(upload_to='exports/', blank=True, null=True)
+    row_count = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+        indexes = [
+            # Partial index: the worker queue only ever scans pending jobs
+            models.Index(fields=['created_at'], condition=models.Q(status='pending'), name='exportjob_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_file_format_display()} export of {self.event.title} ({self.status})"
@@ -0,0 +1,136 @@
+"""Full-page cache for anonymous visitors on the public catalogue pages.
+
+`@cache_anonymous_page` stores whole responses per URL (host, path and
+sorted query string). Logged-in users, visitors with pending messages and
+non-GET requests always get a fresh render, so personalised parts of a page
+never leak between visitors.
+
+Pages are tagged with generation tokens instead of being deleted: saving an
+event, category, review or show time replaces the `catalogue` generation,
+and inventory changes replace the one of the affected event page. A page
+whose generation is outdated (or whose `PAGE_CACHE_TIMEOUT` has passed) is
+re-rendered by the first request that takes the rebuild lock, while
+everybody else keeps getting the stale copy for up to
+`PAGE_CACHE_STALE_SECONDS`.
+"""
+import functools
+import hashlib
+import time
+import uuid
+
+from django.conf import settings
+from django.contrib import messages
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.http import urlencode
+
+CATALOGUE = 'catalogue'
+REBUILD_LOCK_SECONDS = 30
+STATUS_HEADER = 'X-Page-Cache'
+
+
+def _generation_key(scope):
+    return f'page_cache:generation:{scope}'
+
+
+def bump(scope=CATALOGUE):
+    """Outdate every page tagged with `scope` right away"""
+    cache.set(_generation_key(scope), uuid.uuid4().hex, None)
+
+
+def invalidate(scope=CATALOGUE):
+    """Outdate every page tagged with `scope`, now and again once the
+    current transaction commits (so a page re-rendered from the old rows in
+    the meantime is not kept)"""
+    bump(scope)
+    transaction.on_commit(lambda: bump(scope))
+
+
+def event_scope(slug):
+    return f'event:{slug}'
+
+
+def _generations(scopes):
+    keys = [_generation_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    for key in keys:
+        if key not in found:
+            cache.add(key, uuid.uuid4().hex, None)
+            found[key] = cache.get(key)
+    return [found[key] for key in keys]
+
+
+def _page_key(request):
+    query = urlencode(sorted(request.GET.lists()), doseq=True)
+    url = f'{request.get_host()}{request.path}?{query}'
+    return f'page_cache:page:{hashlib.md5(url.encode("utf-8")).hexdigest()}'
+
+
+def _cacheable_request(request):
+    if request.method not in ('GET', 'HEAD'):
+        return False
+    # Only visitors with a session cookie can be logged in; skip the session lookup for the rest
+    if settings.SESSION_COOKIE_NAME in request.COOKIES and request.user.is_authenticated:
+        return False
+    return not len(messages.get_messages(request))
+
+
+def _cacheable_response(request, response):
+    return (
+        response.status_code == 200
+        and not response.streaming
+        and not response.cookies
+        # A page with a CSRF token is tied to this visitor's cookie. get_token()
+        # flags the request; CsrfViewMiddleware only sets the cookie after this
+        and not request.META.get('CSRF_COOKIE_NEEDS_UPDATE')
+    )
+
+
+def cache_anonymous_page(view_func=None, *, scope=None):
+    """Serve anonymous GETs of the view from the page cache.
+
+    `scope` maps the view's URL kwargs to an extra generation scope
+    (e.g. the event page for a slug).
+    """
+    def decorator(view_func):
+        @functools.wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if not settings.PAGE_CACHE_ENABLED or not _cacheable_request(request):
+                response = view_func(request, *args, **kwargs)
+                response[STATUS_HEADER] = 'BYPASS'
+                return response
+
+            generations = _generations([CATALOGUE] + ([scope(**kwargs)] if scope else []))
+            key = _page_key(request)
+            lock_key = f'{key}:rebuild'
+            entry = cache.get(key)
+            if entry is not None:
+                if entry['generations'] == generations and time.time() < entry['fresh_until']:
+                    entry['response'][STATUS_HEADER] = 'HIT'
+                    return entry['response']
+                if not cache.add(lock_key, True, REBUILD_LOCK_SECONDS):
+                    # Somebody else is re-rendering the page
+                    entry['response'][STATUS_HEADER] = 'STALE'
+                    return entry['response']
+
+            try:
+                response = view_func(request, *args, **kwargs)
+                if _cacheable_response(request, response):
+                    cache.set(key, {
+                        'response': response,
+                        'generations': generations,
+                        'fresh_until': time.time() + settings.PAGE_CACHE_TIMEOUT,
+                    }, settings.PAGE_CACHE_TIMEOUT + settings.PAGE_CACHE_STALE_SECONDS)
+                elif entry is not None:
+                    # e.g. the event was unpublished: stop serving the old page
+                    cache.delete(key)
+            finally:
+                if entry is not None:
+                    cache.delete(lock_key)
+            response[STATUS_HEADER] = 'MISS'
+            return response
+        return wrapper
+
+    if view_func is not None:
+        return decorator(view_func)
+    return decorator
@@ -0,0 +1,262 @@
+"""Per-request profiling: Server-Timing headers and sampled slow requests.
+
+With `REQUEST_PROFILING` on, `ProfilingMiddleware` times each request's
+database queries, cache calls, template rendering and QR encoding and sends
+the totals in a `Server-Timing` header (shown in the browser's network
+panel). A `PROFILE_SAMPLE_RATE` share of requests also records every query
+and runs under cProfile; sampled requests slower than `SLOW_REQUEST_MS` are
+written to a bounded on-disk ring buffer that staff can browse.
+
+With profiling off the middleware removes itself and the timers below cost
+one context variable lookup.
+"""
+import cProfile
+import functools
+import io
+import json
+import os
+import pstats
+import random
+import threading
+import time
+import uuid
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.template.backends.django import DjangoTemplates, Template, reraise
+from django.template.exceptions import TemplateDoesNotExist
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+SECTIONS = ('db', 'cache', 'template', 'qr')
+MAX_SAMPLED_QUERIES = 500
+
+_current = ContextVar('request_profile', default=None)
+
+
+class RequestProfile:
+    """Time spent per section during one request"""
+
+    def __init__(self, sample=False):
+        self.durations = dict.fromkeys(SECTIONS, 0.0)
+        self.counts = dict.fromkeys(SECTIONS, 0)
+        self.queries = [] if sample else None
+        self._lock = threading.Lock()
+
+    def add(self, section, seconds, sql=None):
+        with self._lock:
+            self.durations[section] += seconds
+            self.counts[section] += 1
+            if sql is not None and self.queries is not None and len(self.queries) < MAX_SAMPLED_QUERIES:
+                self.queries.append({'sql': sql, 'ms': round(seconds * 1000, 2)})
+
+    def server_timing(self, total):
+        metrics = [
+            f'{section};dur={self.durations[section] * 1000:.1f};desc="{self.counts[section]} calls"'
+            for section in SECTIONS if self.counts[section]
+        ]
+        metrics.append(f'total;dur={total * 1000:.1f}')
+        return ', '.join(metrics)
+
+
+class timed:
+    """Add the time spent in a block (or decorated function) to the current request's profile"""
+
+    def __init__(self, section):
+        self.section = section
+
+    def __enter__(self):
+        self.profile = _current.get()
+        if self.profile is not None:
+            self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        if self.profile is not None:
+            self.profile.add(self.section, time.perf_counter() - self.started)
+
+    def __call__(self, func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(self.section):
+                return func(*args, **kwargs)
+        return wrapper
+
+
+def time_queries(execute, sql, params, many, context):
+    """Database execute wrapper; installed on every connection when profiling is on"""
+    profile = _current.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        profile.add('db', time.perf_counter() - started, sql if profile.queries is not None else None)
+
+
+def install_query_timer(sender, connection, **kwargs):
+    if time_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_queries)
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    """Django template backend whose top-level renders are timed"""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(self.engine.get_template(template_name), self)
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+class TimedTemplate(Template):
+    def render(self, context=None, request=None):
+        with timed('template'):
+            return super().render(context, request)
+
+
+class TimedCache:
+    """Cache backend wrapper timing every call of the wrapped backend.
+
+    Configured as `{'BACKEND': 'events.profiling.TimedCache', 'WRAPPED': {...}}`.
+    """
+
+    def __init__(self, location, params):
+        wrapped = params['WRAPPED']
+        self._cache = import_string(wrapped['BACKEND'])(wrapped.get('LOCATION', ''), wrapped)
+
+    def __getattr__(self, name):
+        attr = getattr(self._cache, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        if iscoroutinefunction(attr):
+            async def timed_async(*args, **kwargs):
+                with timed('cache'):
+                    return await attr(*args, **kwargs)
+            return timed_async
+        return timed('cache')(attr)
+
+    def __contains__(self, key):
+        return self.has_key(key)
+
+
+# Slow request ring buffer
+
+def _profile_dir():
+    return settings.SLOW_REQUEST_DIR
+
+
+def save_slow_request(record):
+    """Write a slow request sample and drop the oldest beyond SLOW_REQUEST_KEEP"""
+    directory = _profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    name = f"{time.time_ns()}-{record['id']}.json"
+    tmp_path = os.path.join(directory, f'.{name}.tmp')
+    with open(tmp_path, 'w') as fh:
+        json.dump(record, fh)
+    os.replace(tmp_path, os.path.join(directory, name))
+
+    samples = sorted(f for f in os.listdir(directory) if f.endswith('.json'))
+    for old in samples[:-settings.SLOW_REQUEST_KEEP]:
+        try:
+            os.remove(os.path.join(directory, old))
+        except FileNotFoundError:
+            pass  # pruned by another process
+
+
+def slow_requests():
+    """Saved slow request records, newest first"""
+    directory = _profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    records = []
+    for name in sorted((f for f in os.listdir(directory) if f.endswith('.json')), reverse=True):
+        try:
+            with open(os.path.join(directory, name)) as fh:
+                records.append(json.load(fh))
+        except (FileNotFoundError, ValueError):
+            continue
+    return records
+
+
+def get_slow_request(sample_id):
+    return next((record for record in slow_requests() if record['id'] == sample_id), None)
+
+
+def _stats_text(profiler, limit=40):
+    stream = io.StringIO()
+    pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(limit)
+    return stream.getvalue()
+
+
+class ProfilingMiddleware:
+    """Emit Server-Timing headers and capture sampled slow requests"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_PROFILING:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def _start(self):
+        sample = random.random() < settings.PROFILE_SAMPLE_RATE
+        profile = RequestProfile(sample=sample)
+        return profile, _current.set(profile), time.perf_counter()
+
+    def _finish(self, request, response, profile, started, profiler=None):
+        total = time.perf_counter() - started
+        response['Server-Timing'] = profile.server_timing(total)
+        if profile.queries is not None and total * 1000 >= settings.SLOW_REQUEST_MS:
+            save_slow_request({
+                'id': uuid.uuid4().hex[:12],
+                'at': timezone.now().isoformat(),
+                'method': request.method,
+                'path': request.get_full_path(),
+                'status': response.status_code,
+                'duration_ms': round(total * 1000, 1),
+                'sections': {
+                    section: {'ms': round(profile.durations[section] * 1000, 1), 'calls': profile.counts[section]}
+                    for section in SECTIONS
+                },
+                'queries': profile.queries,
+                'profile': _stats_text(profiler) if profiler else '',
+            })
+        return response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        profile, token, started = self._start()
+        profiler = cProfile.Profile() if profile.queries is not None else None
+        try:
+            if profiler:
+                try:
+                    profiler.enable()
+                except ValueError:
+                    # Another profiler is already active in this thread
+                    profiler = None
+            response = self.get_response(request)
+        finally:
+            if profiler:
+                profiler.disable()
+            _current.reset(token)
+        return self._finish(request, response, profile, started, profiler)
+
+    async def __acall__(self, request):
+        # cProfile only sees the event loop thread, so async requests record timings and queries only
+        profile, token, started = self._start()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, profile, started)
@@ -1,6 +1,56 @@
+from datetime import timedelta
+
+from django.utils import timezone
 from rest_framework import serializers
 
+from .models import Category, Event
+
 
 class QRValidateSerializer(serializers.Serializer):
     token = serializers.CharField()
     device_info = serializers.CharField(required=False, allow_blank=True)
+
+
+class SalesSeriesQuerySerializer(serializers.Serializer):
+    """Query parameters for the organizer sales series API"""
+    start = serializers.DateField(required=False)
+    end = serializers.DateField(required=False)
+    granularity = serializers.ChoiceField(choices=['hour', 'day'], default='day')
+
+    def validate(self, attrs):
+        end = attrs.get('end') or timezone.localdate()
+        start = attrs.get('start') or end - timedelta(days=29)
+        if start > end:
+            raise serializers.ValidationError('start must be on or before end')
+        attrs['start'], attrs['end'] = start, end
+        return attrs
+
+
+class CategorySummarySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Category
+        fields = ['id', 'name']
+
+
+class EventSerializer(serializers.ModelSerializer):
+    """Public event data for the catalogue API.
+
+    Pass `fields` (e.g. from `?fields=slug,title,price`) to return only
+    those fields; unknown names are ignored.
+    """
+    category = CategorySummarySerializer(read_only=True)
+    url = serializers.HyperlinkedIdentityField(view_name='api_event_detail', lookup_field='slug')
+
+    class Meta:
+        model = Event
+        fields = [
+            'id', 'slug', 'url', 'title', 'description', 'event_type', 'category',
+            'venue', 'address', 'city', 'event_date', 'start_time', 'price',
+            'total_tickets', 'available_tickets', 'image', 'is_featured', 'updated_at',
+        ]
+
+    def __init__(self, *args, fields=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
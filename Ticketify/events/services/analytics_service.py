@@ -0,0 +1,180 @@
+"""Incremental sales rollups for organizer analytics.
+
+Booking and scan activity is folded into per-event hourly and daily
+`SalesRollup` rows as it happens, so reports never have to scan the
+transactional `Booking`/`Ticket` tables. Rollups are updated after the
+booking or scan commits, so concurrent bookings never queue on the same
+rollup row inside their transactions.
+
+Both the incremental updates and `rebuild()` follow the same rules:
+`tickets_sold` and `revenue` count bookings that are confirmed now, in the
+bucket the booking was created in; `cancellations` count confirmed bookings
+that were cancelled or refunded later, in the bucket of the cancellation;
+`scans` count successful entries in the scan log.
+"""
+import logging
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, Exists, F, OuterRef, Sum
+from django.db.models.functions import TruncDay, TruncHour
+from django.utils import timezone
+
+from ..models import Booking, SalesRollup, Ticket, TicketScanLog
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ('hour', 'day')
+
+
+def bucket_start(when, granularity):
+    """Truncate a datetime to the start of its hour/day bucket in local time"""
+    local = timezone.localtime(when).replace(minute=0, second=0, microsecond=0)
+    if granularity == 'day':
+        local = local.replace(hour=0)
+    return local
+
+
+def _increment(event_id, granularity, start, deltas):
+    """Add deltas to one rollup row, creating it on first use"""
+    updates = {field: F(field) + value for field, value in deltas.items()}
+    rows = SalesRollup.objects.filter(
+        event_id=event_id, granularity=granularity, bucket_start=start
+    ).update(**updates)
+    if rows:
+        return
+    if any(value < 0 for value in deltas.values()):
+        # Taking back a sale whose bucket is gone: hourly rows are compacted
+        # away, and the daily row (updated alongside) carries the change
+        if granularity != 'hour':
+            logger.warning('Sales rollup %s bucket %s of event %s is missing; dropped %s', granularity, start, event_id, deltas)
+        return
+    try:
+        with transaction.atomic():
+            SalesRollup.objects.create(event_id=event_id, granularity=granularity, bucket_start=start, **deltas)
+    except IntegrityError:
+        # Another worker created the bucket first; apply our deltas to it
+        SalesRollup.objects.filter(
+            event_id=event_id, granularity=granularity, bucket_start=start
+        ).update(**updates)
+
+
+def _apply(event_id, when, deltas):
+    for granularity in GRANULARITIES:
+        _increment(event_id, granularity, bucket_start(when, granularity), deltas)
+
+
+def record(event_id, when=None, **deltas):
+    """Apply counter deltas to the hourly and daily buckets containing `when`
+    once the current transaction commits"""
+    deltas = {field: value for field, value in deltas.items() if value}
+    if not deltas:
+        return
+    when = when or timezone.now()
+    transaction.on_commit(lambda: _apply(event_id, when, deltas))
+
+
+def record_booking(booking):
+    record(booking.event_id, booking.created_at, tickets_sold=booking.quantity, revenue=booking.total_amount)
+
+
+def record_cancellation(booking, when=None):
+    """Take a confirmed booking out of its sales bucket and count the cancellation"""
+    record(booking.event_id, booking.created_at, tickets_sold=-booking.quantity, revenue=-booking.total_amount)
+    record(booking.event_id, when, cancellations=booking.quantity)
+
+
+def record_scan(event_id, when=None):
+    record(event_id, when, scans=1)
+
+
+def compact(older_than_days=30, now=None):
+    """Drop hourly buckets older than the retention window.
+
+    Daily buckets are maintained alongside hourly ones, so old history stays
+    available at daily resolution after compaction. Returns the number of
+    hourly rows removed.
+    """
+    now = now or timezone.now()
+    cutoff = bucket_start(now - timedelta(days=older_than_days), 'day')
+    deleted, _ = SalesRollup.objects.filter(granularity='hour', bucket_start__lt=cutoff).delete()
+    return deleted
+
+
+def rebuild(event_ids=None):
+    """Recompute rollups from the transactional tables (one-off backfill)"""
+    rollups = SalesRollup.objects.all()
+    bookings = Booking.objects.all()
+    scans = TicketScanLog.objects.filter(success=True)
+    if event_ids is not None:
+        rollups = rollups.filter(event_id__in=event_ids)
+        bookings = bookings.filter(event_id__in=event_ids)
+        scans = scans.filter(ticket__event_id__in=event_ids)
+
+    tzinfo = timezone.get_current_timezone()
+    buckets = {}
+    for granularity, trunc in (('hour', TruncHour), ('day', TruncDay)):
+        sold = (
+            bookings.filter(status='confirmed')
+            .annotate(bucket=trunc('created_at', tzinfo=tzinfo))
+            .values('event_id', 'bucket')
+            .annotate(tickets=Sum('quantity'), amount=Sum('total_amount'))
+        )
+        for row in sold:
+            counters = buckets.setdefault((row['event_id'], granularity, row['bucket']), {})
+            counters['tickets_sold'] = row['tickets']
+            counters['revenue'] = row['amount'] or Decimal('0')
+
+        # Only bookings that were confirmed (and so issued tickets) count as cancelled;
+        # released holds never sold anything
+        cancelled = (
+            bookings.filter(status__in=['cancelled', 'refunded'])
+            .filter(Exists(Ticket.objects.filter(booking=OuterRef('pk'))))
+            .annotate(bucket=trunc('updated_at', tzinfo=tzinfo))
+            .values('event_id', 'bucket')
+            .annotate(tickets=Sum('quantity'))
+        )
+        for row in cancelled:
+            buckets.setdefault((row['event_id'], granularity, row['bucket']), {})['cancellations'] = row['tickets']
+
+        scanned = (
+            scans.annotate(bucket=trunc('scanned_at', tzinfo=tzinfo))
+            .values('ticket__event_id', 'bucket')
+            .annotate(total=Count('id'))
+        )
+        for row in scanned:
+            buckets.setdefault((row['ticket__event_id'], granularity, row['bucket']), {})['scans'] = row['total']
+
+    with transaction.atomic():
+        rollups.delete()
+        SalesRollup.objects.bulk_create([
+            SalesRollup(event_id=event_id, granularity=granularity, bucket_start=start, **counters)
+            for (event_id, granularity, start), counters in buckets.items()
+        ], batch_size=1000)
+    return len(buckets)
+
+
+def sales_series(events, start, end, granularity='day'):
+    """Return rollup totals per bucket for the given events and date range.
+
+    `events` is an Event queryset; the result is a list of dicts ordered by
+    bucket, summed across the selected events.
+    """
+    rows = (
+        SalesRollup.objects.filter(
+            event__in=events,
+            granularity=granularity,
+            bucket_start__gte=start,
+            bucket_start__lt=end,
+        )
+        .order_by('bucket_start')
+        .values('bucket_start')
+        .annotate(
+            tickets_sold=Sum('tickets_sold'),
+            revenue=Sum('revenue'),
+            cancellations=Sum('cancellations'),
+            scans=Sum('scans'),
+        )
+    )
+    return list(rows)
@@ -0,0 +1,153 @@
+"""In-process pub/sub for live ticket availability.
+
+The booking path calls `publish()` (from any thread) after a counter change
+commits. Publishing only marks the event or show time as dirty; a single
+flusher task on the ASGI event loop reads the dirty counters once per
+`AVAILABILITY_FEED_INTERVAL` and hands the latest numbers to every
+subscriber. However many bookings land in that window, each subscriber gets
+at most one update per interval, and an idle subscriber is just a queue.
+
+Only bookings handled by the same process are seen; run the feed in the
+process that serves bookings (or one feed per worker behind sticky routing).
+"""
+import asyncio
+import logging
+import threading
+from collections import defaultdict
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+from django.db.models import Sum
+
+from ..models import Event, InventoryShard, MovieShowTime
+
+logger = logging.getLogger(__name__)
+
+
+def _offer(queue, payload):
+    """Put the latest payload on a one-slot queue, replacing a stale one"""
+    if queue.full():
+        queue.get_nowait()
+    queue.put_nowait(payload)
+
+
+def snapshots(keys):
+    """Current counters for (event_id, show_time_id) keys, with one query per kind"""
+    event_ids = {event_id for event_id, show_time_id in keys if show_time_id is None}
+    show_time_ids = {show_time_id for _, show_time_id in keys if show_time_id is not None}
+    result = {}
+
+    if event_ids:
+        events = Event.objects.filter(pk__in=event_ids, status='published').values(
+            'id', 'available_tickets', 'held_tickets', 'inventory_shards'
+        )
+        sharded = [event['id'] for event in events if event['inventory_shards']]
+        shard_totals = {}
+        if sharded:
+            shard_totals = {
+                row['event_id']: row
+                for row in InventoryShard.objects.filter(event_id__in=sharded).values('event_id').annotate(
+                    available_tickets=Sum('available_tickets'), held_tickets=Sum('held_tickets')
+                )
+            }
+        for event in events:
+            counters = shard_totals.get(event['id'], event)
+            result[(event['id'], None)] = (counters['available_tickets'], counters['held_tickets'])
+
+    if show_time_ids:
+        for show_time in MovieShowTime.objects.filter(pk__in=show_time_ids, event__status='published').values(
+            'id', 'event_id', 'available_tickets', 'held_tickets'
+        ):
+            result[(show_time['event_id'], show_time['id'])] = (show_time['available_tickets'], show_time['held_tickets'])
+
+    return {
+        key: {
+            'event': key[0],
+            'show_time': key[1],
+            'available': available,
+            'held': held,
+            'sold_out': available <= 0,
+        }
+        for key, (available, held) in result.items()
+    }
+
+
+def _pooled_snapshots(keys):
+    """snapshots() on an executor thread, which outlives requests and their connection cleanup"""
+    close_old_connections()
+    try:
+        return snapshots(keys)
+    finally:
+        close_old_connections()
+
+
+async def read_snapshots(keys):
+    """snapshots() off the event loop, without queueing behind other sync code"""
+    return await sync_to_async(_pooled_snapshots, thread_sensitive=False)(keys)
+
+
+class AvailabilityBroker:
+    """Fan availability changes out to SSE subscribers on one event loop"""
+
+    def __init__(self, interval=None):
+        self.interval = interval
+        self._subscribers = defaultdict(set)
+        self._watched = set()
+        self._dirty = set()
+        self._lock = threading.Lock()
+        self._flusher = None
+
+    def subscribe(self, key):
+        """Register a subscriber queue (call from the event loop)"""
+        queue = asyncio.Queue(maxsize=1)
+        self._subscribers[key].add(queue)
+        self._watched.add(key)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.ensure_future(self._flush_loop())
+        return queue
+
+    def unsubscribe(self, key, queue):
+        queues = self._subscribers.get(key)
+        if queues is not None:
+            queues.discard(queue)
+            if not queues:
+                del self._subscribers[key]
+                self._watched.discard(key)
+
+    def publish(self, event_id, show_time_id=None):
+        """Mark counters as changed (thread-safe, cheap when nobody listens)"""
+        key = (event_id, show_time_id)
+        if key in self._watched:
+            with self._lock:
+                self._dirty.add(key)
+
+    async def flush(self):
+        """Send the latest counters for everything published since the last flush"""
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+        if not dirty:
+            return 0
+        latest = await read_snapshots(dirty)
+        sent = 0
+        for key, payload in latest.items():
+            for queue in self._subscribers.get(key, ()):
+                _offer(queue, payload)
+                sent += 1
+        return sent
+
+    async def _flush_loop(self):
+        interval = self.interval or getattr(settings, 'AVAILABILITY_FEED_INTERVAL', 1.0)
+        while self._subscribers:
+            await asyncio.sleep(interval)
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception('Availability feed flush failed')
+
+
+broker = AvailabilityBroker()
+
+
+def publish(event_id, show_time_id=None):
+    broker.publish(event_id, show_time_id)
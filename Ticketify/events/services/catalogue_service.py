@@ -0,0 +1,95 @@
+"""Event catalogue filtering shared by the events list page and the events API"""
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.db.models import Count, Q, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+# Sort options; the trailing id keeps the order total
+SORT_ORDERINGS = {
+    'date': ('event_date', 'start_time', 'id'),
+    'price_low': ('price', 'id'),
+    'price_high': ('-price', '-id'),
+    'popular': ('-booking_count', '-id'),
+}
+
+# Cursor pages take their position from the first field, so it must never be
+# NULL (see with_sort_at) and must not change while a client pages through;
+# 'popular' ranks by a live count and is paged by number instead
+CURSOR_ORDERINGS = {
+    'date': ('sort_at', 'id'),
+    'price_low': ('price', 'id'),
+    'price_high': ('-price', '-id'),
+}
+# Where unscheduled events (no date) sort: after every dated one
+UNSCHEDULED_SORT_AT = datetime(9999, 12, 31, tzinfo=dt_timezone.utc)
+
+
+def _weekend_start(today):
+    """Saturday of this weekend (today if it is Saturday, yesterday on Sunday)"""
+    days_until_saturday = (5 - today.weekday()) % 7
+    if days_until_saturday == 0 and today.weekday() == 5:  # Today is Saturday
+        return today
+    if today.weekday() == 6:  # Today is Sunday
+        return today - timedelta(days=1)
+    return today + timedelta(days=days_until_saturday)
+
+
+def filter_events(events, params):
+    """Apply the search, category, date and price filters from query params"""
+    # Search - Enhanced to include category names
+    search_query = params.get('search', '')
+    if search_query:
+        events = events.filter(
+            Q(title__icontains=search_query) |
+            Q(description__icontains=search_query) |
+            Q(city__icontains=search_query) |
+            Q(venue__icontains=search_query) |
+            Q(category__name__icontains=search_query)
+        )
+
+    # Category filter
+    category_id = params.get('category', '')
+    if category_id.isdecimal():
+        events = events.filter(category_id=category_id)
+
+    # Date filter ('all' or empty shows past and future events)
+    date_filter = params.get('date', '')
+    today = timezone.localdate()
+    if date_filter == 'upcoming':
+        # Still bookable: events that have started today are included
+        events = events.not_past()
+    elif date_filter == 'today':
+        events = events.filter(event_date__gte=today, event_date__lt=today + timedelta(days=1))
+    elif date_filter == 'tomorrow':
+        tomorrow = today + timedelta(days=1)
+        events = events.filter(event_date__gte=tomorrow, event_date__lt=tomorrow + timedelta(days=1))
+    elif date_filter == 'weekend':
+        weekend_start = _weekend_start(today)
+        events = events.filter(event_date__gte=weekend_start, event_date__lt=weekend_start + timedelta(days=2))
+
+    # Price filter
+    price_filter = params.get('price', '')
+    if price_filter == 'free':
+        events = events.filter(price=0)
+    elif price_filter == 'paid':
+        events = events.filter(price__gt=0)
+
+    return events
+
+
+def sort_key(params):
+    sort_by = params.get('sort', 'date')
+    return sort_by if sort_by in SORT_ORDERINGS else 'date'
+
+
+def with_sort_at(events):
+    """Annotate `sort_at`: the start time, never NULL"""
+    return events.annotate(sort_at=Coalesce('starts_at', Value(UNSCHEDULED_SORT_AT)))
+
+
+def sort_events(events, sort_by):
+    """Order events by one of SORT_ORDERINGS"""
+    if sort_by == 'popular':
+        events = events.annotate(booking_count=Count('bookings'))
+    return events.order_by(*SORT_ORDERINGS.get(sort_by, SORT_ORDERINGS['date']))
@@ -0,0 +1,309 @@
+"""Attendee exports for organizers.
+
+Rows are read with a server-side iterator so memory stays flat no matter
+how many tickets an event has. Small exports stream straight to the
+browser; large ones run as an `ExportJob` and are downloaded when done.
+
+Under ASGI, Django buffers a streaming response whose content is a plain
+iterator, so the responses below take `asynchronous=True` there and hand
+Django an async iterator that pulls the file block by block instead.
+"""
+import csv
+import io
+import logging
+import tempfile
+import threading
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files import File
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import content_disposition_header
+
+from ..models import ExportJob, Ticket
+
+logger = logging.getLogger(__name__)
+
+EXPORT_HEADER = [
+    'Ticket ID', 'Booking ID', 'Attendee Name', 'Attendee Email', 'Phone', 'Seat',
+    'Show Date', 'Show Time', 'Ticket Status', 'Booking Status', 'Booked At', 'Validated At',
+]
+
+# Spreadsheet apps run cells starting with these as formulas
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+FILE_BLOCK_SIZE = 64 * 1024
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+class ExportUnavailable(Exception):
+    """Raised when an export format cannot be produced in this environment"""
+
+
+def _chunk_size():
+    return getattr(settings, 'EXPORT_CHUNK_SIZE', 2000)
+
+
+def _format_datetime(value):
+    return timezone.localtime(value).strftime('%Y-%m-%d %H:%M') if value else ''
+
+
+def _safe_text(value):
+    """Quote buyer-entered text that a spreadsheet would evaluate as a formula"""
+    value = value or ''
+    return f"'{value}" if value.startswith(FORMULA_PREFIXES) else value
+
+
+def attendee_rows(event):
+    """Yield one row per ticket for the event, ordered by ticket id"""
+    tickets = (
+        Ticket.objects.filter(event=event)
+        .select_related('booking', 'booking__show_time')
+        .order_by('id')
+        .iterator(chunk_size=_chunk_size())
+    )
+    for ticket in tickets:
+        booking = ticket.booking
+        show_time = booking.show_time
+        yield [
+            ticket.ticket_id,
+            booking.booking_id,
+            _safe_text(ticket.attendee_name),
+            _safe_text(ticket.attendee_email),
+            _safe_text(booking.phone),
+            _safe_text(ticket.seat_number),
+            show_time.show_date.isoformat() if show_time else '',
+            show_time.start_time.strftime('%H:%M') if show_time else '',
+            ticket.get_status_display(),
+            booking.get_status_display(),
+            _format_datetime(booking.created_at),
+            _format_datetime(ticket.validated_at),
+        ]
+
+
+def export_filename(event, file_format):
+    return f"{event.slug}-attendees-{timezone.localdate():%Y%m%d}.{file_format}"
+
+
+class _TextAdapter:
+    """Encode csv.writer output into a binary file"""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+
+    def write(self, value):
+        self.fileobj.write(value.encode('utf-8'))
+
+
+def _csv_blocks(event):
+    """Yield the attendee CSV in blocks of EXPORT_CHUNK_SIZE rows"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_HEADER)
+    for count, row in enumerate(attendee_rows(event), 1):
+        writer.writerow(row)
+        if count % _chunk_size() == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+async def _aiter_blocks(blocks, close=None):
+    """Async iterator over a sync one for ASGI streaming.
+
+    Each block is produced on the request's sync thread, which holds the
+    database connection (and server-side cursor) the view used.
+    """
+    next_block = sync_to_async(next, thread_sensitive=True)
+    try:
+        while (block := await next_block(blocks, None)) is not None:
+            yield block
+    finally:
+        if close is not None:
+            await sync_to_async(close, thread_sensitive=True)()
+
+
+def stream_csv_response(event, asynchronous=False):
+    """Stream the attendee list as CSV without building it in memory"""
+    blocks = _csv_blocks(event)
+    response = StreamingHttpResponse(
+        _aiter_blocks(blocks) if asynchronous else blocks, content_type=CONTENT_TYPES['csv'],
+    )
+    response['Content-Disposition'] = content_disposition_header(True, export_filename(event, 'csv'))
+    return response
+
+
+def file_response(fileobj, filename, content_type, asynchronous=False):
+    """Stream an open binary file as a download and close it afterwards"""
+    if not asynchronous:
+        return FileResponse(fileobj, as_attachment=True, filename=filename, content_type=content_type)
+    blocks = iter(lambda: fileobj.read(FILE_BLOCK_SIZE), b'')
+    response = StreamingHttpResponse(_aiter_blocks(blocks, close=fileobj.close), content_type=content_type)
+    response['Content-Disposition'] = content_disposition_header(True, filename)
+    return response
+
+
+def write_csv(event, fileobj):
+    """Write the attendee CSV to a binary file object, returning the row count"""
+    writer = csv.writer(_TextAdapter(fileobj))
+    writer.writerow(EXPORT_HEADER)
+    count = 0
+    for row in attendee_rows(event):
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def write_xlsx(event, fileobj):
+    """Write the attendee list as XLSX using openpyxl's write-only mode.
+
+    Write-only worksheets spool rows to disk as they are appended, so the
+    workbook never holds more than one row in memory.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ExportUnavailable('XLSX export requires the openpyxl package')
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title='Attendees')
+    sheet.append(EXPORT_HEADER)
+    count = 0
+    for row in attendee_rows(event):
+        sheet.append(row)
+        count += 1
+    workbook.save(fileobj)
+    return count
+
+
+WRITERS = {
+    'csv': write_csv,
+    'xlsx': write_xlsx,
+}
+
+
+def xlsx_response(event, asynchronous=False):
+    """Build the XLSX in a temporary file and stream it back in chunks"""
+    tmp = tempfile.TemporaryFile()
+    try:
+        write_xlsx(event, tmp)
+    except Exception:
+        tmp.close()
+        raise
+    tmp.seek(0)
+    return file_response(tmp, export_filename(event, 'xlsx'), CONTENT_TYPES['xlsx'], asynchronous)
+
+
+def should_run_in_background(event):
+    """Large events are exported by a background job instead of inline"""
+    threshold = getattr(settings, 'EXPORT_BACKGROUND_THRESHOLD', 50000)
+    return Ticket.objects.filter(event=event).count() > threshold
+
+
+def recover_stale_jobs():
+    """Requeue jobs left running by a worker that died, returning their ids.
+
+    A job counts as stale once it has been running for longer than
+    EXPORT_JOB_TIMEOUT_MINUTES; after EXPORT_JOB_MAX_ATTEMPTS tries it is
+    marked failed instead.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(minutes=settings.EXPORT_JOB_TIMEOUT_MINUTES)
+    # Jobs claimed before started_at existed have none
+    stale = ExportJob.objects.filter(Q(started_at__lt=cutoff) | Q(started_at__isnull=True), status='running')
+    stale.filter(attempts__gte=settings.EXPORT_JOB_MAX_ATTEMPTS).update(
+        status='failed', error='Export timed out', finished_at=now,
+    )
+    job_ids = list(stale.values_list('pk', flat=True))
+    ExportJob.objects.filter(pk__in=job_ids, status='running').update(status='pending')
+    for job_id in job_ids:
+        logger.warning('Export job %s timed out and was requeued', job_id)
+    return job_ids
+
+
+def _running():
+    return {'status': 'running', 'started_at': timezone.now(), 'attempts': F('attempts') + 1}
+
+
+def claim_export_jobs(limit):
+    """Mark up to `limit` pending jobs as running for this worker and return them.
+
+    Where the database supports SKIP LOCKED (PostgreSQL), concurrent workers
+    lock disjoint sets of rows and never wait on each other; elsewhere each
+    job is claimed with a conditional update.
+    """
+    pending = ExportJob.objects.filter(status='pending').select_related('event').order_by('created_at')
+    if not connection.features.has_select_for_update_skip_locked:
+        return [job for job in pending[:limit] if _claim(job)]
+
+    with transaction.atomic():
+        jobs = list(pending.select_for_update(skip_locked=True, of=('self',))[:limit])
+        ExportJob.objects.filter(pk__in=[job.pk for job in jobs]).update(**_running())
+    for job in jobs:
+        job.refresh_from_db(fields=['status', 'started_at', 'attempts'])
+    return jobs
+
+
+def _claim(job):
+    if not ExportJob.objects.filter(pk=job.pk, status='pending').update(**_running()):
+        return False
+    job.refresh_from_db(fields=['status', 'started_at', 'attempts'])
+    return True
+
+
+def run_export_job(job):
+    """Produce the export file for a job. Returns False if another worker has it."""
+    if not _claim(job):
+        return False
+    execute_export_job(job)
+    return True
+
+
+def execute_export_job(job):
+    """Produce the export file for a job this worker has claimed"""
+    try:
+        with tempfile.TemporaryFile() as tmp:
+            job.row_count = WRITERS[job.file_format](job.event, tmp)
+            tmp.seek(0)
+            job.file.save(export_filename(job.event, job.file_format), File(tmp), save=False)
+        job.status = 'done'
+    except Exception as exc:
+        logger.exception('Export job %s failed', job.pk)
+        job.status = 'failed'
+        job.error = str(exc)
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'file', 'row_count', 'error', 'finished_at'])
+
+
+def _run_in_thread(job_id):
+    close_old_connections()
+    try:
+        job = ExportJob.objects.select_related('event').get(pk=job_id)
+        run_export_job(job)
+    finally:
+        connection.close()
+
+
+def start_export_job(event, user, file_format):
+    """Queue an export job and, unless disabled, run it in a background thread.
+
+    Running in process, this also retries jobs whose thread died with its
+    process; `run_export_jobs` does the same for the worker setup.
+    """
+    job = ExportJob.objects.create(event=event, requested_by=user, file_format=file_format)
+    if getattr(settings, 'EXPORT_JOBS_IN_PROCESS', True):
+        job_ids = [job.pk] + recover_stale_jobs()
+
+        def start():
+            for job_id in job_ids:
+                threading.Thread(target=_run_in_thread, args=(job_id,), daemon=True).start()
+        transaction.on_commit(start)
+    return job
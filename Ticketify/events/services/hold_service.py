@@ -0,0 +1,190 @@
+"""Time-limited holds for pending bookings.
+
+A booking is created `pending` with an `expires_at` timestamp and reserves
+its tickets (and seats) straight away. Checkout confirms it before the hold
+runs out; otherwise the sweeper cancels it and puts the inventory back.
+Expired holds are found through a partial index on pending bookings, so a
+sweep only touches rows that are actually due.
+"""
+import logging
+import threading
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+
+from ..models import Booking, Ticket
+from . import inventory_service, seat_service
+
+logger = logging.getLogger(__name__)
+
+
+class HoldExpired(Exception):
+    """Raised when confirming a booking whose hold is gone"""
+
+
+def hold_duration():
+    return timedelta(minutes=getattr(settings, 'BOOKING_HOLD_MINUTES', 15))
+
+
+@transaction.atomic
+def place_hold(booking, seat_zone=None):
+    """Reserve tickets and seats for an unsaved booking and save it as pending.
+
+    The ticket counter is checked first (InventoryUnavailable) as it is the
+    cheapest rejection; a seat conflict (SeatUnavailable) rolls it back.
+    """
+    event, show_time = booking.event, booking.show_time
+    inventory_service.reserve(event, show_time, booking.quantity)
+
+    # Claim seats atomically when the event has a seat map: the buyer's
+    # picks if given, otherwise the best available block
+    selected_seats = booking.selected_seats or []
+    if event.seat_map_id:
+        if selected_seats:
+            selected_seats = seat_service.claim_seats(event, show_time, selected_seats)
+        else:
+            selected_seats = seat_service.allocate_best_available(event, show_time, booking.quantity, seat_zone)
+    booking.selected_seats = selected_seats or None
+
+    booking.status = 'pending'
+    booking.expires_at = timezone.now() + hold_duration()
+    booking.save()
+    return booking
+
+
+@transaction.atomic
+def confirm_booking(booking):
+    """Turn an active hold into a confirmed booking and issue its tickets.
+
+    Raises HoldExpired when the hold has run out and InventoryUnavailable
+    when its tickets are no longer held.
+    """
+    # Clearing expires_at claims the hold: the sweeper only picks up pending
+    # bookings that still have an expiry in the past
+    claimed = Booking.objects.filter(
+        pk=booking.pk, status='pending', expires_at__gt=timezone.now()
+    ).update(expires_at=None)
+    if not claimed:
+        raise HoldExpired('Your reservation has expired, please book again')
+
+    if not inventory_service.commit(booking.event, booking.show_time, booking.quantity):
+        # The held tickets are gone from the counters; rolling back keeps the hold for the sweeper
+        logger.error('Booking %s has no held tickets to commit', booking.booking_id)
+        raise inventory_service.InventoryUnavailable('Your reservation could not be confirmed, please book again')
+
+    # Created one by one: Ticket.save() assigns ids and renders the QR code
+    user = booking.user
+    seats = iter(booking.selected_seats or [])
+    for _ in range(booking.quantity):
+        Ticket.objects.create(
+            booking=booking,
+            event=booking.event,
+            user=user,
+            attendee_name=user.get_full_name() or user.username,
+            attendee_email=booking.email,
+            seat_number=next(seats, None),
+        )
+
+    # Saved (not updated) so the status-change signal records the sale
+    booking.status = 'confirmed'
+    booking.expires_at = None
+    booking.save(update_fields=['status', 'expires_at'])
+    return booking
+
+
+def _release(bookings):
+    """Give back the tickets and seats of bookings that were just cancelled"""
+    quantities = defaultdict(int)
+    seats = defaultdict(list)
+    targets = {}
+    for booking in bookings:
+        key = (booking.event_id, booking.show_time_id)
+        targets[key] = (booking.event, booking.show_time)
+        quantities[key] += booking.quantity
+        seats[key].extend(booking.selected_seats or [])
+
+    for key, (event, show_time) in targets.items():
+        inventory_service.release(event, show_time, quantities[key])
+        seat_service.release_seats(event, show_time, seats[key])
+
+
+@transaction.atomic
+def release_hold(booking):
+    """Cancel a pending booking before it expires. Returns False if it is no longer held."""
+    cancelled = Booking.objects.filter(
+        pk=booking.pk, status='pending', expires_at__isnull=False
+    ).update(status='cancelled', expires_at=None)
+    if cancelled:
+        booking.status = 'cancelled'
+        booking.expires_at = None
+        _release([booking])
+    return bool(cancelled)
+
+
+def _claim_expired(now, batch_size):
+    """Lock and cancel up to `batch_size` expired holds, returning them"""
+    candidates = Booking.objects.filter(status='pending', expires_at__lte=now)
+    features = connection.features
+    if features.has_select_for_update_skip_locked:
+        # Row locks make the candidates ours: flip them with one update
+        candidates = candidates.select_for_update(skip_locked=True, of=('self',))
+    bookings = list(
+        candidates.select_related('event__seat_map', 'show_time').order_by('expires_at')[:batch_size]
+    )
+    if not bookings:
+        return []
+
+    if features.has_select_for_update_skip_locked:
+        Booking.objects.filter(pk__in=[b.pk for b in bookings]).update(status='cancelled', expires_at=None)
+        return bookings
+
+    # Without row locks a checkout may have claimed a hold since it was read
+    return [
+        booking for booking in bookings
+        if Booking.objects.filter(pk=booking.pk, status='pending', expires_at__lte=now)
+        .update(status='cancelled', expires_at=None)
+    ]
+
+
+def release_expired_holds(now=None, batch_size=500):
+    """Cancel every expired hold in batches and return the number released"""
+    now = now or timezone.now()
+    released = 0
+    while True:
+        with transaction.atomic():
+            bookings = _claim_expired(now, batch_size)
+            _release(bookings)
+        released += len(bookings)
+        if not bookings:
+            return released
+
+
+def run_sweeper(interval, stop_event=None, batch_size=500):
+    """Release expired holds every `interval` seconds until `stop_event` is set"""
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        close_old_connections()
+        try:
+            released = release_expired_holds(batch_size=batch_size)
+            if released:
+                logger.info('Released %s expired booking holds', released)
+        except Exception:
+            logger.exception('Releasing expired booking holds failed')
+        finally:
+            connection.close()
+        stop_event.wait(interval)
+
+
+_sweeper = None
+
+
+def start_sweeper(interval):
+    """Run the sweeper in a daemon thread of this process (once)"""
+    global _sweeper
+    if _sweeper is None or not _sweeper.is_alive():
+        _sweeper = threading.Thread(target=run_sweeper, args=(interval,), name='hold-sweeper', daemon=True)
+        _sweeper.start()
+    return _sweeper
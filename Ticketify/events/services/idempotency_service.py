@@ -0,0 +1,63 @@
+"""Idempotency keys for state-changing requests.
+
+A client sends the same key with every retry of one logical request (the
+booking form renders one as a hidden field; API clients send an
+`Idempotency-Key` header). The first request claims the key in the cache;
+repeats get the stored result back instead of running the transaction again.
+
+A claim is only PENDING for `IDEMPOTENCY_PENDING_TTL`, so a request that
+crashed does not block retries for a day; stored results are kept for
+`IDEMPOTENCY_KEY_TTL`. The cache must be shared by all workers (checked at
+startup, see events.shared_cache).
+"""
+import re
+
+from django.conf import settings
+from django.core.cache import cache
+
+PENDING = 'pending'
+KEY_RE = re.compile(r'^[A-Za-z0-9_-]{8,64}$')
+
+
+def _ttl():
+    return getattr(settings, 'IDEMPOTENCY_KEY_TTL', 24 * 3600)
+
+
+def _pending_ttl():
+    return getattr(settings, 'IDEMPOTENCY_PENDING_TTL', 120)
+
+
+def _cache_key(scope, key):
+    return f'idempotency:{scope}:{key}'
+
+
+def clean_key(value):
+    """The key if it is well formed, else None (request runs without idempotency)"""
+    return value if value and KEY_RE.match(value) else None
+
+
+def lookup(scope, key):
+    """Stored result (or PENDING) for a key, None if it was never claimed"""
+    return cache.get(_cache_key(scope, key))
+
+
+def claim(scope, key):
+    """Claim a key for this request.
+
+    Returns None when the caller owns the key and should do the work,
+    PENDING while the first request is still running, or the stored result.
+    """
+    cache_key = _cache_key(scope, key)
+    if cache.add(cache_key, PENDING, _pending_ttl()):
+        return None
+    return cache.get(cache_key, PENDING)
+
+
+def store(scope, key, result):
+    """Remember the result of the request that claimed the key"""
+    cache.set(_cache_key(scope, key), result, _ttl())
+
+
+def release(scope, key):
+    """Forget a claim whose request failed, so the client can retry"""
+    cache.delete(_cache_key(scope, key))
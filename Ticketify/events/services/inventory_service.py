@@ -0,0 +1,206 @@
+"""Ticket counters for events and movie show times.
+
+Counters are only ever changed with conditional `F()` updates, so concurrent
+bookings cannot oversell and never overwrite each other's decrements. Held
+tickets move from `available_tickets` to `held_tickets` when a hold is
+placed, and are either committed (sold) or released back when it ends.
+
+Hot events can split their counters over `InventoryShard` rows. A booking
+then updates one random shard; only when that shard runs short are the
+shards locked together, the tickets taken from wherever they are left, and
+the remainder spread evenly again. The event row keeps a copy of the shard
+totals for listings. Writing it on every change would queue buyers on that
+one row again, so it is refreshed at most once per
+`INVENTORY_SHARD_SYNC_SECONDS` (and by `manage.py sync_inventory_shards`);
+the event page and booking form read the shard sums with `load_counters()`.
+"""
+import random
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Subquery, Sum
+from django.utils import timezone
+
+from .. import metrics, page_cache
+from ..models import Event, InventoryShard, MovieShowTime
+from . import availability_feed
+
+MAX_REBALANCE_ATTEMPTS = 5
+
+
+class InventoryUnavailable(Exception):
+    """Raised when not enough tickets are left to hold"""
+
+
+class _ShardConflict(Exception):
+    """A shard changed while being rebalanced"""
+
+
+def _counter(event, show_time):
+    """Queryset for the row whose counters a booking draws from"""
+    if event.event_type == 'movie' and show_time:
+        return MovieShowTime.objects.filter(pk=show_time.pk), {}
+    return Event.objects.filter(pk=event.pk), {'updated_at': timezone.now()}
+
+
+def is_sharded(event, show_time=None):
+    # Movies already spread their bookings over show times
+    return bool(event.inventory_shards) and not (event.event_type == 'movie' and show_time)
+
+
+def _move(event, show_time, quantity, source, target=None):
+    """Move `quantity` from counter `source` to `target` (or just drop it).
+
+    Returns False when there is not enough in `source`.
+    """
+    changes = {source: F(source) - quantity}
+    if target:
+        changes[target] = F(target) + quantity
+
+    if is_sharded(event, show_time):
+        shard = random.randrange(event.inventory_shards)
+        rows = InventoryShard.objects.filter(event=event, shard=shard, **{f'{source}__gte': quantity})
+        moved = bool(rows.update(**changes)) or _rebalance(event, quantity, source, target)
+    else:
+        rows, extra = _counter(event, show_time)
+        moved = bool(rows.filter(**{f'{source}__gte': quantity}).update(**changes, **extra))
+
+    if moved:
+        # Live availability subscribers hear about it once the change is committed
+        show_time_id = show_time.pk if event.event_type == 'movie' and show_time else None
+
+        sharded = is_sharded(event, show_time)
+
+        def changed():
+            if sharded:
+                sync_shards_throttled(event)
+            availability_feed.publish(event.pk, show_time_id)
+            # The cached anonymous event page shows availability too
+            page_cache.bump(page_cache.event_scope(event.slug))
+        transaction.on_commit(changed)
+    return moved
+
+
+def _rebalance(event, quantity, source, target):
+    """Take `quantity` from all shards together, then spread the rest evenly.
+
+    Each shard is rewritten with a compare-and-swap on its old value, so a
+    concurrent fast-path update makes the attempt roll back and retry.
+    """
+    for _ in range(MAX_REBALANCE_ATTEMPTS):
+        try:
+            with transaction.atomic():
+                moved = _rebalance_once(event, quantity, source, target)
+        except _ShardConflict:
+            continue
+        sync_shards_throttled(event)
+        metrics.INVENTORY_REBALANCES.inc(result='moved' if moved else 'short')
+        return moved
+    metrics.INVENTORY_REBALANCES.inc(result='conflict')
+    return False
+
+
+def _rebalance_once(event, quantity, source, target):
+    shards = list(
+        InventoryShard.objects.select_for_update().filter(event=event).order_by('shard')
+        .values('pk', 'available_tickets', 'held_tickets')
+    )
+    total = sum(shard[source] for shard in shards)
+    if not shards or total < quantity:
+        return False
+
+    remaining = total - quantity
+    share, extra = divmod(remaining, len(shards))
+    for number, shard in enumerate(shards):
+        values = {source: share + (1 if number < extra else 0)}
+        if target and number == 0:
+            values[target] = shard[target] + quantity
+        current = {field: shard[field] for field in values}
+        if not InventoryShard.objects.filter(pk=shard['pk'], **current).update(**values):
+            raise _ShardConflict()
+    return True
+
+
+def reserve(event, show_time, quantity):
+    """Move `quantity` tickets from available to held, or raise InventoryUnavailable"""
+    moved = _move(event, show_time, quantity, 'available_tickets', 'held_tickets')
+    metrics.INVENTORY_OPERATIONS.inc(operation='reserve', result='ok' if moved else 'unavailable')
+    if not moved:
+        raise InventoryUnavailable(f'Sorry, fewer than {quantity} tickets are left')
+
+
+def commit(event, show_time, quantity):
+    """Turn held tickets into sold ones. Returns False if they were not held."""
+    moved = _move(event, show_time, quantity, 'held_tickets')
+    metrics.INVENTORY_OPERATIONS.inc(operation='commit', result='ok' if moved else 'unavailable')
+    return moved
+
+
+def release(event, show_time, quantity):
+    """Return held tickets to the available pool. Returns False if they were not held."""
+    moved = _move(event, show_time, quantity, 'held_tickets', 'available_tickets')
+    metrics.INVENTORY_OPERATIONS.inc(operation='release', result='ok' if moved else 'unavailable')
+    return moved
+
+
+@transaction.atomic
+def shard_event(event, shards):
+    """Split (shards > 0) or merge back (shards = 0) an event's counters"""
+    event = Event.objects.select_for_update().get(pk=event.pk)
+    if event.inventory_shards:
+        sync_shards(event)
+        event.refresh_from_db(fields=['available_tickets', 'held_tickets'])
+        InventoryShard.objects.filter(event=event).delete()
+
+    if shards:
+        available = [event.available_tickets // shards] * shards
+        held = [event.held_tickets // shards] * shards
+        for i in range(event.available_tickets % shards):
+            available[i] += 1
+        for i in range(event.held_tickets % shards):
+            held[i] += 1
+        InventoryShard.objects.bulk_create([
+            InventoryShard(event=event, shard=i, available_tickets=available[i], held_tickets=held[i])
+            for i in range(shards)
+        ])
+    Event.objects.filter(pk=event.pk).update(inventory_shards=shards, updated_at=timezone.now())
+    return event
+
+
+def _shard_total(field):
+    return Subquery(
+        InventoryShard.objects.filter(event=OuterRef('pk')).values('event')
+        .annotate(total=Sum(field)).values('total')
+    )
+
+
+def sync_shards(event):
+    """Copy the shard totals onto the event row (read by listings).
+
+    The copy can be behind the shards: a change landing while this runs, or
+    within the throttle interval, shows up at the next sync.
+    """
+    Event.objects.filter(pk=event.pk).filter(Exists(InventoryShard.objects.filter(event=OuterRef('pk')))).update(
+        available_tickets=_shard_total('available_tickets'),
+        held_tickets=_shard_total('held_tickets'),
+        updated_at=timezone.now(),
+    )
+
+
+def sync_shards_throttled(event):
+    """sync_shards(), at most once per INVENTORY_SHARD_SYNC_SECONDS per event"""
+    if cache.add(f'inventory_shard_sync:{event.pk}', True, timeout=settings.INVENTORY_SHARD_SYNC_SECONDS):
+        sync_shards(event)
+
+
+def load_counters(event):
+    """Set a sharded event's counters from the current shard sums (no write)"""
+    if event.inventory_shards:
+        totals = InventoryShard.objects.filter(event=event).aggregate(
+            available_tickets=Sum('available_tickets'), held_tickets=Sum('held_tickets'),
+        )
+        if totals['available_tickets'] is not None:
+            event.available_tickets = totals['available_tickets']
+            event.held_tickets = totals['held_tickets']
+    return event
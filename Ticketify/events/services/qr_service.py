@@ -2,7 +2,9 @@ import base64
 import hmac
 import hashlib
 import json
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 
 from django.conf import settings
@@ -10,6 +12,9 @@ from django.utils import timezone as dj_timezone
 from django.core.cache import cache
 import qrcode
 
+from events import metrics
+from events.profiling import timed
+
 
 def _time_window(ts=None, interval=None):
     interval = interval or settings.QR_REFRESH_INTERVAL
@@ -22,11 +27,13 @@ def _sign_payload(payload: str, secret: str) -> str:
     return sig
 
 
-def make_token(ticket, now_ts=None):
-    """Create a signed token for the ticket for the current time window.
-    The token contains a JSON payload and HMAC signature then base64 encoded.
-    """
-    secret = ticket.qr_secret or settings.QR_SIGNING_SECRET
+def _prepare_token(ticket, now_ts=None):
+    """Sign a token for the current window and update the ticket's QR fields in memory"""
+    if not ticket.qr_secret:
+        # if ticket has no per-ticket secret, set one derived from settings secret (before signing,
+        # so the first token verifies against the secret that gets saved)
+        ticket.qr_secret = hashlib.sha256(f"{ticket.ticket_id}{settings.QR_SIGNING_SECRET}".encode('utf-8')).hexdigest()
+    secret = ticket.qr_secret
     window_ts = _time_window(now_ts)
 
     payload = {
@@ -36,24 +43,58 @@ def make_token(ticket, now_ts=None):
     }
     payload_json = json.dumps(payload, separators=(',', ':'))
     sig = _sign_payload(payload_json, secret)
+    metrics.QR_GENERATIONS.inc(kind='token')
 
     blob = payload_json + '|' + sig
     token = base64.urlsafe_b64encode(blob.encode('utf-8')).decode('utf-8')
 
-    # store temporary token in cache to help prevent replay and allow quick revocation
-    cache_key = f'qr_token:{ticket.ticket_id}:{window_ts}'
-    cache.set(cache_key, True, timeout=settings.QR_REFRESH_INTERVAL + settings.QR_LEEWAY_SECONDS)
-
     # update ticket's last generated time
     ticket.last_qr_generated_at = dj_timezone.now()
-    if not ticket.qr_secret:
-        # if ticket has no per-ticket secret, set one derived from settings secret
-        ticket.qr_secret = hashlib.sha256(f"{ticket.ticket_id}{settings.QR_SIGNING_SECRET}".encode('utf-8')).hexdigest()
+
+    # temporary token cache entry helps prevent replay and allows quick revocation
+    cache_key = f'qr_token:{ticket.ticket_id}:{window_ts}'
+    return token, cache_key
+
+
+def make_token(ticket, now_ts=None):
+    """Create a signed token for the ticket for the current time window.
+    The token contains a JSON payload and HMAC signature then base64 encoded.
+    """
+    token, cache_key = _prepare_token(ticket, now_ts)
+    cache.set(cache_key, True, timeout=settings.QR_REFRESH_INTERVAL + settings.QR_LEEWAY_SECONDS)
     ticket.save(update_fields=['last_qr_generated_at', 'qr_secret'])
+    return token
+
 
+async def amake_token(ticket, now_ts=None):
+    """Async variant of make_token using the async cache and ORM APIs"""
+    token, cache_key = _prepare_token(ticket, now_ts)
+    await cache.aset(cache_key, True, timeout=settings.QR_REFRESH_INTERVAL + settings.QR_LEEWAY_SECONDS)
+    await ticket.asave(update_fields=['last_qr_generated_at', 'qr_secret'])
     return token
 
 
+def expected_signature(ticket, ts):
+    """Signature a genuine token for this ticket and window must carry"""
+    secret = ticket.qr_secret or settings.QR_SIGNING_SECRET
+    payload_json = json.dumps({'ticket_id': ticket.ticket_id, 'event_id': ticket.event.id, 'ts': ts}, separators=(',', ':'))
+    return _sign_payload(payload_json, secret)
+
+
+_encode_executor = None
+
+
+def encode_executor():
+    """Thread pool that renders QR images off the event loop"""
+    global _encode_executor
+    if _encode_executor is None:
+        _encode_executor = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'QR_ENCODE_WORKERS', 4), thread_name_prefix='qr-encode'
+        )
+    return _encode_executor
+
+
+@timed('qr')
 def generate_qr_base64(token: str) -> str:
     """Generate a PNG QR image for the token and return Base64-encoded image data"""
     qr = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_H, box_size=8, border=2)
@@ -85,3 +126,43 @@ def verify_token(token: str, leeway=None):
     # Try to reconstruct secret: first check ticket-specific secret from cache/db
     # The caller should fetch the ticket and pass its secret if available. For now, return payload and sig for caller to verify.
     return payload, sig
+
+
+def ticket_qr_filename(ticket_id):
+    return f'ticket_{ticket_id}.png'
+
+
+@timed('qr')
+def render_ticket_qr(verification_code, ticket_id, event_id):
+    """PNG bytes of a ticket's printed QR code (verification code and ticket info)"""
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_H,
+        box_size=10,
+        border=4,
+    )
+    qr.add_data(f"{verification_code}|{ticket_id}|{event_id}")
+    qr.make(fit=True)
+    img = qr.make_image(fill_color="black", back_color="white")
+
+    buffer = BytesIO()
+    img.save(buffer, format='PNG')
+    metrics.QR_GENERATIONS.inc(kind='printed')
+    return buffer.getvalue()
+
+
+def write_ticket_qr_batch(rows, directory):
+    """Render and write QR images for (pk, ticket_id, verification_code, event_id) rows.
+
+    Runs in worker processes, so it only uses plain file IO. Returns the
+    (pk, file name) pairs written.
+    """
+    written = []
+    for pk, ticket_id, verification_code, event_id in rows:
+        name = ticket_qr_filename(ticket_id)
+        tmp_path = os.path.join(directory, f'.{name}.tmp')
+        with open(tmp_path, 'wb') as fh:
+            fh.write(render_ticket_qr(verification_code, ticket_id, event_id))
+        os.replace(tmp_path, os.path.join(directory, name))
+        written.append((pk, name))
+    return written
@@ -0,0 +1,295 @@
+"""Seat maps and atomic seat claims.
+
+Each event (or movie show time) keeps its taken seats in a single bitmap row
+(`SeatInventory`). Claims read the bitmap, set the requested bits and write
+it back with a version compare-and-swap, retrying on conflict. A 60,000 seat
+stadium needs a 7.5 KB bitmap and one row read to render availability.
+"""
+import logging
+import re
+from bisect import bisect_right
+
+from django.db import IntegrityError, transaction
+
+from ..models import SeatInventory
+
+logger = logging.getLogger(__name__)
+
+SEAT_LABEL_RE = re.compile(r'^([A-Z]+)(\d+)$')
+MAX_CLAIM_ATTEMPTS = 10
+
+
+class SeatUnavailable(Exception):
+    """Raised when requested seats are invalid or already taken"""
+
+    def __init__(self, message, seats=None):
+        super().__init__(message)
+        self.seats = seats or []
+
+
+class SeatLayout:
+    """Index arithmetic over a seat map layout"""
+
+    def __init__(self, rows):
+        try:
+            self._build(rows)
+        except (AttributeError, KeyError, TypeError, ValueError):
+            # SeatMap.clean() rejects such layouts; maps saved without it may still have them
+            raise SeatUnavailable('Seat selection is unavailable: the seat map is not set up correctly')
+
+    def _build(self, rows):
+        self.rows = []
+        self.offsets = []
+        self._row_index = {}
+        offset = 0
+        for row in rows:
+            label = str(row['row']).upper()
+            seats = int(row['seats'])
+            self._row_index[label] = len(self.rows)
+            self.rows.append({'row': label, 'seats': seats, 'zone': row.get('zone', '')})
+            self.offsets.append(offset)
+            offset += seats
+        self.capacity = offset
+
+    def index(self, label):
+        """Map a seat label like 'B12' to its bit index"""
+        match = SEAT_LABEL_RE.match(label.strip().upper())
+        if not match:
+            raise SeatUnavailable(f'Invalid seat "{label}"', [label])
+        row_label, number = match.group(1), int(match.group(2))
+        row = self._row_index.get(row_label)
+        if row is None or not 1 <= number <= self.rows[row]['seats']:
+            raise SeatUnavailable(f'Seat {label} does not exist', [label])
+        return self.offsets[row] + number - 1
+
+    def row_of(self, index):
+        return bisect_right(self.offsets, index) - 1
+
+    def label(self, index):
+        row = self.row_of(index)
+        return f"{self.rows[row]['row']}{index - self.offsets[row] + 1}"
+
+    def row_range(self, row):
+        start = self.offsets[row]
+        return start, start + self.rows[row]['seats']
+
+
+_layouts = {}
+
+
+def get_layout(seat_map):
+    """Parsed layout for a seat map, cached until the map is edited"""
+    key = (seat_map.pk, seat_map.updated_at)
+    layout = _layouts.get(key)
+    if layout is None:
+        if len(_layouts) >= 256:
+            _layouts.clear()
+        layout = _layouts[key] = SeatLayout(seat_map.layout)
+    return layout
+
+
+def _bitmap_size(layout):
+    return (layout.capacity + 7) // 8
+
+
+def is_taken(bitmap, index):
+    byte = index // 8
+    return byte < len(bitmap) and bool(bitmap[byte] & (0x80 >> (index % 8)))
+
+
+def get_inventory(event, show_time=None):
+    """Fetch (or lazily create) the seat inventory row for an event/show time"""
+    lookup = {'event': event, 'show_time': show_time}
+    inventory = SeatInventory.objects.filter(**lookup).first()
+    if inventory:
+        return inventory
+    try:
+        with transaction.atomic():
+            layout = get_layout(event.seat_map)
+            return SeatInventory.objects.create(
+                taken=bytes(_bitmap_size(layout)),
+                row_runs=[row['seats'] for row in layout.rows],
+                **lookup
+            )
+    except IntegrityError:
+        return SeatInventory.objects.get(**lookup)
+
+
+def parse_seats(seat_map, labels):
+    """Validate seat labels against the layout and return their indexes"""
+    layout = get_layout(seat_map)
+    indexes = [layout.index(label) for label in labels]
+    if len(set(indexes)) != len(indexes):
+        raise SeatUnavailable('The same seat was selected more than once', labels)
+    return indexes
+
+
+def _free_runs(bitmap, layout, row):
+    """Yield (start, length) for each run of free seats in a row"""
+    start, end = layout.row_range(row)
+    run_start = None
+    for i in range(start, end):
+        if is_taken(bitmap, i):
+            if run_start is not None:
+                yield run_start, i - run_start
+                run_start = None
+        elif run_start is None:
+            run_start = i
+    if run_start is not None:
+        yield run_start, end - run_start
+
+
+def _max_run(bitmap, layout, row):
+    return max((length for _, length in _free_runs(bitmap, layout, row)), default=0)
+
+
+def _row_runs(inventory, bitmap, layout):
+    """The stored per-row free-run index, rebuilt if missing or stale"""
+    runs = list(inventory.row_runs or [])
+    if len(runs) != len(layout.rows) or any(
+        not isinstance(run, int) or not 0 <= run <= row['seats'] for run, row in zip(runs, layout.rows)
+    ):
+        runs = [_max_run(bitmap, layout, row) for row in range(len(layout.rows))]
+    return runs
+
+
+def _update_bits(event, show_time, change):
+    """Apply `change(bitmap, layout, row_runs)` with optimistic retries.
+
+    `change` edits the bitmap in place and returns (result, touched seat
+    indexes); the free-run index is refreshed for the touched rows only.
+    """
+    layout = get_layout(event.seat_map)
+    inventory = get_inventory(event, show_time)
+    for _ in range(MAX_CLAIM_ATTEMPTS):
+        bitmap = bytearray(bytes(inventory.taken).ljust(_bitmap_size(layout), b'\0'))
+        row_runs = _row_runs(inventory, bitmap, layout)
+        result, touched = change(bitmap, layout, row_runs)
+        for row in {layout.row_of(i) for i in touched}:
+            row_runs[row] = _max_run(bitmap, layout, row)
+        updated = SeatInventory.objects.filter(pk=inventory.pk, version=inventory.version).update(
+            taken=bytes(bitmap), row_runs=row_runs, version=inventory.version + 1
+        )
+        if updated:
+            return result
+        inventory.refresh_from_db(fields=['taken', 'row_runs', 'version'])
+    raise SeatUnavailable('Seats are in high demand right now, please try again')
+
+
+def _take(bitmap, indexes):
+    for i in indexes:
+        bitmap[i // 8] |= 0x80 >> (i % 8)
+
+
+def claim_seats(event, show_time, labels):
+    """Atomically mark seats as taken, or raise SeatUnavailable if any are gone"""
+    indexes = parse_seats(event.seat_map, labels)
+
+    def claim(bitmap, layout, row_runs):
+        taken = [layout.label(i) for i in indexes if is_taken(bitmap, i)]
+        if taken:
+            raise SeatUnavailable(f"Seat{'s' if len(taken) > 1 else ''} {', '.join(taken)} already taken", taken)
+        _take(bitmap, indexes)
+        return [layout.label(i) for i in indexes], indexes
+
+    return _update_bits(event, show_time, claim)
+
+
+def find_best_available(bitmap, layout, row_runs, quantity, zone=None):
+    """Pick `quantity` adjacent free seats: the front-most row that fits, as
+    close to the row's centre as possible. Returns seat indexes or None.
+
+    Rows whose longest free run is too short are skipped using the
+    precomputed `row_runs`, so only candidate rows are scanned seat by seat.
+    """
+    for row, info in enumerate(layout.rows):
+        if row_runs[row] < quantity or (zone and info['zone'] != zone):
+            continue
+        row_start, row_end = layout.row_range(row)
+        centre = (row_start + row_end) / 2
+        best = None
+        for run_start, length in _free_runs(bitmap, layout, row):
+            if length < quantity:
+                continue
+            # Slide the block towards the centre, staying inside the run
+            ideal = round(centre - quantity / 2)
+            start = min(max(ideal, run_start), run_start + length - quantity)
+            distance = abs(start + quantity / 2 - centre)
+            if best is None or distance < best[0]:
+                best = (distance, start)
+        if best:
+            return list(range(best[1], best[1] + quantity))
+    return None
+
+
+def allocate_best_available(event, show_time, quantity, zone=None):
+    """Atomically claim the best block of adjacent seats and return their labels"""
+
+    def allocate(bitmap, layout, row_runs):
+        indexes = find_best_available(bitmap, layout, row_runs, quantity, zone)
+        if indexes is None:
+            where = f' in {zone}' if zone else ''
+            raise SeatUnavailable(f'No block of {quantity} adjacent seats available{where}')
+        _take(bitmap, indexes)
+        return [layout.label(i) for i in indexes], indexes
+
+    return _update_bits(event, show_time, allocate)
+
+
+def release_seats(event, show_time, labels):
+    """Return seats to the pool (cancellations, expired holds).
+
+    Labels that no longer exist in the seat map are skipped, so a cancellation
+    never fails over seats that cannot be put back.
+    """
+    if not labels or not event.seat_map_id:
+        return
+    try:
+        layout = get_layout(event.seat_map)
+    except SeatUnavailable:
+        logger.warning('Not releasing seats of event %s: its seat map is invalid', event.pk)
+        return
+    indexes = set()
+    for label in labels:
+        try:
+            indexes.add(layout.index(label))
+        except SeatUnavailable:
+            logger.warning('Not releasing unknown seat %r of event %s', label, event.pk)
+    if not indexes:
+        return
+
+    def release(bitmap, layout, row_runs):
+        for i in indexes:
+            bitmap[i // 8] &= ~(0x80 >> (i % 8)) & 0xFF
+        return None, indexes
+
+    _update_bits(event, show_time, release)
+
+
+def zones(seat_map):
+    """Distinct price zones in layout order"""
+    return list(dict.fromkeys(row['zone'] for row in get_layout(seat_map).rows if row['zone']))
+
+
+def availability(event, show_time=None):
+    """Per-row availability for rendering, computed from the bitmap alone.
+
+    Each row carries a `map` string with one character per seat: '1' taken,
+    '0' free.
+    """
+    layout = get_layout(event.seat_map)
+    inventory = SeatInventory.objects.filter(event=event, show_time=show_time).values_list('taken', flat=True).first()
+    bits = ''.join(format(byte, '08b') for byte in bytes(inventory or b'')).ljust(layout.capacity, '0')
+
+    rows = []
+    for number, row in enumerate(layout.rows):
+        start, end = layout.row_range(number)
+        seat_bits = bits[start:end]
+        rows.append({
+            'row': row['row'],
+            'zone': row['zone'],
+            'seats': row['seats'],
+            'free': seat_bits.count('0'),
+            'map': seat_bits,
+        })
+    return {'capacity': layout.capacity, 'free': sum(row['free'] for row in rows), 'rows': rows}
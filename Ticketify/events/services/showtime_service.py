@@ -0,0 +1,96 @@
+"""Show time scheduling for movie events.
+
+Show times are materialized ahead of time (by the `schedule_show_times`
+management command and when a movie is saved) with a single
+`bulk_create(ignore_conflicts=True)`, so booking pages only ever read them.
+"""
+from collections import defaultdict
+from datetime import time, timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from ..models import Event, MovieShowTime, ShowTimeTemplate
+
+# Used when neither the event nor its venue has templates: 9 AM, 2 PM, 6 PM, 10 PM
+DEFAULT_SLOTS = [
+    (time(9, 0), time(12, 0)),
+    (time(14, 0), time(17, 0)),
+    (time(18, 0), time(21, 0)),
+    (time(22, 0), time(1, 0)),
+]
+
+
+def _slots_by_event(events):
+    """Resolve the daily slots for each event with one template query"""
+    event_ids = [event.id for event in events]
+    venues = {event.venue for event in events}
+    templates = ShowTimeTemplate.objects.filter(
+        Q(event_id__in=event_ids) | Q(event__isnull=True, venue__in=venues),
+        is_active=True,
+    )
+
+    by_event = defaultdict(list)
+    by_venue = defaultdict(list)
+    for template in templates.order_by('start_time'):
+        slot = (template.start_time, template.end_time)
+        if template.event_id:
+            by_event[template.event_id].append(slot)
+        else:
+            by_venue[template.venue].append(slot)
+
+    return {
+        event.id: by_event.get(event.id) or by_venue.get(event.venue) or DEFAULT_SLOTS
+        for event in events
+    }
+
+
+def schedule_show_times(events, start_date=None, days=1):
+    """Create missing show times for `days` days from `start_date`.
+
+    No show is scheduled before a movie's release date (`event_date`).
+    Existing show times are left untouched. Returns the number of show
+    times submitted to the database.
+    """
+    events = [event for event in events if event.event_type == 'movie' and event.event_date]
+    if not events:
+        return 0
+
+    start_date = start_date or timezone.localdate()
+    slots = _slots_by_event(events)
+    show_times = []
+    for event in events:
+        for offset in range(days):
+            show_date = start_date + timedelta(days=offset)
+            if show_date < event.event_date:
+                continue
+            for start, end in slots[event.id]:
+                show_times.append(MovieShowTime(
+                    event=event,
+                    show_date=show_date,
+                    start_time=start,
+                    end_time=end,
+                    available_tickets=event.total_tickets,
+                ))
+
+    MovieShowTime.objects.bulk_create(show_times, ignore_conflicts=True, batch_size=500)
+    return len(show_times)
+
+
+def schedulable_movies(days, today=None):
+    """Published movies that are showing at some point in the next `days` days"""
+    today = today or timezone.localdate()
+    run_days = getattr(settings, 'MOVIE_RUN_DAYS', 28)
+    return Event.objects.filter(
+        event_type='movie',
+        status='published',
+        event_date__gt=today - timedelta(days=run_days),
+        event_date__lt=today + timedelta(days=days),
+    )
+
+
+def materialize(days=7, today=None):
+    """Schedule show times for every running movie over the next `days` days"""
+    today = today or timezone.localdate()
+    return schedule_show_times(list(schedulable_movies(days, today)), start_date=today, days=days)
@@ -0,0 +1,131 @@
+"""Virtual waiting room for high-demand on-sales.
+
+While an event has `waiting_room_rate` set, buyers join a queue before they
+can open the booking form. Joining hands out a signed token carrying the
+buyer's position (a cache counter) and joining time; admission is computed
+from the clock, so position `p` is let in once `WAITING_ROOM_BURST + rate *
+minutes open` reaches it. Checking a position needs only the token and one
+cache read.
+
+The position counter must be shared by every server process, so rooms
+cannot be enabled while the default cache is per process (local memory)
+outside DEBUG; see Event.clean().
+"""
+from collections import namedtuple
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.utils import timezone
+
+from ..models import Event
+
+TOKEN_SALT = 'events.waiting_room'
+STATE_TIMEOUT = 60
+COUNTER_TIMEOUT = 24 * 3600
+
+QueueTicket = namedtuple('QueueTicket', ['position', 'joined_at'])
+
+
+def cookie_name(event_id):
+    return f'wr_{event_id}'
+
+
+def _burst():
+    return getattr(settings, 'WAITING_ROOM_BURST', 50)
+
+
+def _admission_window():
+    return getattr(settings, 'WAITING_ROOM_ADMISSION_MINUTES', 10) * 60
+
+
+def room_state(event):
+    """Queue settings for an event, or None when its waiting room is off"""
+    if not event.waiting_room_rate:
+        return None
+    opens_at = event.waiting_room_opens_at or event.created_at
+    return {'event_id': event.id, 'rate': event.waiting_room_rate, 'opens_at': int(opens_at.timestamp())}
+
+
+def _state_key(event_id):
+    return f'waiting_room:{event_id}:state'
+
+
+def forget_room_state(event_id):
+    """Drop the cached queue settings after a room is opened or closed"""
+    cache.delete(_state_key(event_id))
+
+
+def cached_room_state(event_id):
+    """Queue settings for the status endpoint, read through a short-lived cache"""
+    key = _state_key(event_id)
+    state = cache.get(key)
+    if state is None:
+        event = Event.objects.filter(pk=event_id).only('id', 'waiting_room_rate', 'waiting_room_opens_at', 'created_at').first()
+        state = (room_state(event) if event else None) or {}
+        cache.set(key, state, STATE_TIMEOUT)
+    return state or None
+
+
+def _counter_key(state):
+    # Keyed by the opening time so reopening a room starts a fresh queue
+    return f"waiting_room:{state['event_id']}:{state['opens_at']}:issued"
+
+
+def join(state, user, now=None):
+    """Take the next queue position and return a signed token for it"""
+    key = _counter_key(state)
+    cache.add(key, 0, timeout=COUNTER_TIMEOUT)
+    position = cache.incr(key)
+    joined_at = int((now or timezone.now()).timestamp())
+    return signing.dumps(
+        {'e': state['event_id'], 'o': state['opens_at'], 'u': user.pk, 'p': position, 'j': joined_at},
+        salt=TOKEN_SALT,
+    )
+
+
+def read_token(state, token, user_id=None):
+    """QueueTicket from a token issued for this room (and user), else None"""
+    try:
+        payload = signing.loads(token or '', salt=TOKEN_SALT)
+    except signing.BadSignature:
+        return None
+    if payload.get('e') != state['event_id'] or payload.get('o') != state['opens_at']:
+        return None
+    if user_id is not None and payload.get('u') != user_id:
+        return None
+    if not payload.get('p'):
+        return None
+    return QueueTicket(payload['p'], payload.get('j', state['opens_at']))
+
+
+def admitted_up_to(state, now=None):
+    """Highest queue position admitted so far"""
+    now = (now or timezone.now()).timestamp()
+    elapsed = now - state['opens_at']
+    if elapsed < 0:
+        return 0
+    return _burst() + int(elapsed * state['rate'] / 60)
+
+
+def admitted_at(state, position):
+    """Unix time at which a position is (or was) let in"""
+    return state['opens_at'] + max(0, position - _burst()) * 60 / state['rate']
+
+
+def status(state, ticket, now=None):
+    """Where a queue ticket stands: still waiting, admitted, or admission lapsed"""
+    now = now or timezone.now()
+    position = ticket.position
+    ahead = max(0, position - admitted_up_to(state, now))
+    result = {'position': position, 'ahead': ahead, 'admitted': ahead == 0, 'expired': False, 'wait_seconds': 0}
+    if ahead:
+        result['wait_seconds'] = int(admitted_at(state, position) - now.timestamp()) + 1
+    else:
+        # Admitted buyers get a limited window so early positions cannot be
+        # hoarded. It starts when the position came up, or when the buyer
+        # joined if that is later (late joiners in a quiet room)
+        window_start = max(admitted_at(state, position), ticket.joined_at)
+        if now.timestamp() > window_start + _admission_window():
+            result.update(admitted=False, expired=True)
+    return result
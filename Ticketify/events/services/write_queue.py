@@ -0,0 +1,144 @@
+"""Serialized writes for single-box SQLite deployments.
+
+SQLite allows one writer at a time; with many request threads writing at
+once they queue on the file lock and fail with "database is locked". With
+`SQLITE_WRITE_QUEUE` on, booking and scan writes are handed to one writer
+thread instead. It runs queued jobs back to back on its own connection and
+commits several of them in one transaction (each in its own savepoint, so a
+failing job does not undo the others), paying for one fsync per batch. If
+the batch commit fails, its jobs are retried one transaction each.
+
+With the queue off (the default, and on other databases) `run()` simply
+calls the function.
+"""
+import logging
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class WriteTimeout(Exception):
+    """The queued write did not finish in time; it may still commit later"""
+
+
+class WriteCancelled(Exception):
+    """The queued write timed out before it started and will not run"""
+
+
+class WriteQueue:
+    """One writer thread executing submitted callables in batched transactions"""
+
+    def __init__(self, batch_size=50):
+        self.batch_size = batch_size
+        self._jobs = queue.Queue()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+                self._thread.start()
+
+    def stop(self, timeout=None):
+        thread = self._thread
+        if thread and thread.is_alive():
+            self._jobs.put(_STOP)
+            thread.join(timeout)
+
+    def submit(self, fn, *args, **kwargs):
+        """Queue a write; returns a Future for its result"""
+        self.start()
+        future = Future()
+        self._jobs.put((future, fn, args, kwargs))
+        return future
+
+    def _next_batch(self):
+        batch = [self._jobs.get()]
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._jobs.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        try:
+            while True:
+                batch = self._next_batch()
+                stop = _STOP in batch
+                jobs = [job for job in batch if job is not _STOP]
+                if jobs:
+                    self._execute(jobs)
+                if stop:
+                    return
+        finally:
+            connection.close()
+
+    def _execute(self, jobs):
+        close_old_connections()
+        started, results = [], []
+        try:
+            with transaction.atomic():
+                for job in jobs:
+                    if job[0].set_running_or_notify_cancel():
+                        started.append(job)
+                        results.append(self._attempt(job))
+        except Exception:
+            # The batch commit failed and took the successful jobs with it;
+            # retry those one by one so each reports what actually happened
+            logger.exception('Write batch of %s jobs failed to commit; retrying them separately', len(jobs))
+            close_old_connections()
+            results = [
+                self._attempt(job) if exc is None else (future, result, exc)
+                for job, (future, result, exc) in zip(started, results)
+            ]
+        for future, result, exc in results:
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+
+    @staticmethod
+    def _attempt(job):
+        """(future, result, exception) of one job in its own (nested) transaction"""
+        future, fn, args, kwargs = job
+        try:
+            with transaction.atomic():
+                return future, fn(*args, **kwargs), None
+        except Exception as exc:
+            return future, None, exc
+
+
+_queue = WriteQueue()
+
+
+def enabled():
+    return getattr(settings, 'SQLITE_WRITE_QUEUE', False) and connection.vendor == 'sqlite'
+
+
+def run(fn, *args, **kwargs):
+    """Run a write through the queue when enabled and wait for its result.
+
+    Exceptions raised by `fn` are re-raised in the caller. When the write
+    takes longer than SQLITE_WRITE_QUEUE_TIMEOUT, WriteCancelled is raised if
+    it had not started yet (it never runs), WriteTimeout if it had.
+    """
+    if not enabled():
+        return fn(*args, **kwargs)
+    timeout = getattr(settings, 'SQLITE_WRITE_QUEUE_TIMEOUT', 30)
+    future = _queue.submit(fn, *args, **kwargs)
+    try:
+        return future.result(timeout=timeout)
+    except FutureTimeout:
+        # Still queued: drop it, so the caller knows it never ran
+        if future.cancel():
+            raise WriteCancelled(f'Queued write did not start within {timeout}s')
+        raise WriteTimeout(f'Queued write did not finish within {timeout}s')
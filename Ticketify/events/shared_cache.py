@@ -0,0 +1,39 @@
+"""Whether the default cache is shared by all server processes.
+
+The waiting room's queue counter and booking idempotency keys coordinate
+requests through the cache, so every worker has to see the same one. The
+local-memory and dummy backends keep their data per process, which is only
+good enough under DEBUG or with SINGLE_PROCESS set.
+"""
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import ImproperlyConfigured
+
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def backend(alias='default'):
+    """The configured cache backend, unwrapped from the timing/metrics wrappers"""
+    cache = caches[alias]
+    while isinstance(getattr(cache, '_cache', None), BaseCache):
+        cache = cache._cache
+    return cache
+
+
+def is_shared(alias='default'):
+    """Whether every request of the site sees the same cache"""
+    if settings.DEBUG or getattr(settings, 'SINGLE_PROCESS', False):
+        return True
+    return not isinstance(backend(alias), PROCESS_LOCAL_BACKENDS)
+
+
+def require_shared():
+    """Refuse to start with a per-process cache behind several workers"""
+    if not is_shared():
+        raise ImproperlyConfigured(
+            'Booking idempotency keys and waiting rooms need a cache shared by all server '
+            'processes: set REDIS_URL, or SINGLE_PROCESS=1 when the site runs as one process.'
+        )
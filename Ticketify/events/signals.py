@@ -1,21 +1,26 @@
-from django.db.models.signals import post_save
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.db.backends.signals import connection_created
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_init, post_save
 from django.dispatch import receiver
 from django.contrib.auth.models import User
-from .models import UserProfile, Booking, Ticket
+from . import metrics, page_cache
+from .models import UserProfile, Event, Booking, Ticket, TicketScanLog, Category, Review, MovieShowTime
+from .services import analytics_service, seat_service, showtime_service
 
 
 @receiver(post_save, sender=User)
-def create_user_profile(sender, instance, created, **kwargs):
-    """Create user profile when new user is created"""
-    if created:
-        UserProfile.objects.create(user=instance)
-
+def create_user_profile(sender, instance, created, raw=False, **kwargs):
+    """Create user profile when new user is created.
 
-@receiver(post_save, sender=User)
-def save_user_profile(sender, instance, **kwargs):
-    """Save user profile when user is saved"""
-    if hasattr(instance, 'profile'):
-        instance.profile.save()
+    Profiles are saved on their own when their fields change; saving the user
+    (e.g. the last_login update on every login) no longer touches the profile.
+    """
+    if created and not raw:
+        UserProfile.objects.create(user=instance)
 
 
 @receiver(post_save, sender=Booking)
@@ -34,10 +39,87 @@ def create_tickets_for_booking(sender, instance, created, **kwargs):
 
         # Update available tickets on event or show_time if present
         if instance.show_time:
-            st = instance.show_time
-            st.available_tickets = max(0, st.available_tickets - instance.quantity)
-            st.save()
+            counter = instance.show_time
         else:
-            event = instance.event
-            event.available_tickets = max(0, event.available_tickets - instance.quantity)
-            event.save()
+            counter = instance.event
+        # Events also bump updated_at, which versions the events API's ETags
+        extra = {} if instance.show_time else {'updated_at': timezone.now()}
+        type(counter).objects.filter(pk=counter.pk).update(
+            available_tickets=Greatest(F('available_tickets') - instance.quantity, 0), **extra
+        )
+        counter.refresh_from_db(fields=['available_tickets'])
+
+
+@receiver(post_init, sender=Booking)
+def remember_booking_status(sender, instance, **kwargs):
+    """Keep the loaded status so saves can detect status transitions"""
+    instance._loaded_status = instance.__dict__.get('status') if instance.pk else None
+
+
+@receiver(post_save, sender=Booking)
+def handle_booking_status_change(sender, instance, created, raw=False, **kwargs):
+    """Update analytics rollups and release seats on booking status transitions"""
+    previous = instance._loaded_status
+    instance._loaded_status = instance.status
+    if raw or previous == instance.status:
+        return
+    if instance.status == 'confirmed':
+        analytics_service.record_booking(instance)
+        quantity = instance.quantity
+        transaction.on_commit(lambda: _count_booking(quantity))
+    elif instance.status in ('cancelled', 'refunded') and previous == 'confirmed':
+        analytics_service.record_cancellation(instance)
+        seat_service.release_seats(instance.event, instance.show_time, instance.selected_seats)
+
+
+def _count_booking(quantity):
+    metrics.BOOKINGS.inc()
+    metrics.TICKETS_SOLD.inc(quantity)
+
+
+@receiver(post_save, sender=TicketScanLog)
+def count_scan_outcome(sender, instance, created, raw=False, **kwargs):
+    """Count every logged scan by its outcome note"""
+    if created and not raw:
+        metrics.QR_VALIDATIONS.inc(outcome=metrics.outcome_label(instance.notes))
+
+
+@receiver(post_save, sender=TicketScanLog)
+def record_scan_rollup(sender, instance, created, raw=False, **kwargs):
+    """Count successful gate scans in the analytics rollups"""
+    if created and not raw and instance.success:
+        analytics_service.record_scan(instance.ticket.event_id, instance.scanned_at)
+
+
+@receiver(post_save, sender=Event)
+def schedule_movie_show_times(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    """Make sure a movie has show times on its release date as soon as it is saved"""
+    if raw or instance.event_type != 'movie':
+        return
+    if update_fields is not None and not {'event_date', 'event_type'} & set(update_fields):
+        return
+    showtime_service.schedule_show_times([instance], start_date=instance.event_date, days=1)
+
+
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Review)
+@receiver(post_delete, sender=Review)
+@receiver(post_save, sender=MovieShowTime)
+@receiver(post_delete, sender=MovieShowTime)
+def invalidate_catalogue_pages(sender, raw=False, **kwargs):
+    """Outdate the cached anonymous catalogue pages"""
+    if not raw:
+        page_cache.invalidate()
+
+
+@receiver(connection_created)
+def apply_sqlite_profile(sender, connection, **kwargs):
+    """Tune each new SQLite connection with the production PRAGMAs"""
+    if connection.vendor != 'sqlite' or not settings.SQLITE_PRODUCTION_PROFILE:
+        return
+    with connection.cursor() as cursor:
+        for pragma, value in settings.SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma} = {value}')
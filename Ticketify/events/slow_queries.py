@@ -0,0 +1,186 @@
+"""Slow-query log with call sites and query plans.
+
+With `SLOW_QUERY_LOG` on, every connection gets an execute wrapper that
+logs queries slower than `SLOW_QUERY_MS` together with the line of app code
+that ran them (preferring the view), and captures the database's query plan
+the first time each process sees a query shape. Entries are appended to a
+per-process JSON-lines file in `SLOW_QUERY_DIR`; the staff report groups
+them by SQL fingerprint, i.e. the statement with literals and `IN` lists
+folded, so the same ORM query with different parameters adds up.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+VIEW_FILES = {os.path.join(APP_DIR, name) for name in ('views.py', 'api_views.py', 'async_api_views.py')}
+# Instrumentation modules never count as the call site
+SKIP_FILES = {os.path.join(APP_DIR, name) for name in ('slow_queries.py', 'profiling.py', 'metrics.py')}
+EXPLAIN_PREFIXES = {'sqlite': 'EXPLAIN QUERY PLAN ', 'postgresql': 'EXPLAIN ', 'mysql': 'EXPLAIN '}
+MAX_SQL_LENGTH = 4000
+
+_explaining = ContextVar('slow_query_explaining', default=False)
+_explained = set()
+_write_lock = threading.Lock()
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r'\b\d+(?:\.\d+)?\b')
+_IN_LIST = re.compile(r'\bIN \(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize(sql):
+    """SQL with literals and placeholders as `?` and IN lists folded"""
+    sql = _STRING.sub('?', sql)
+    sql = _NUMBER.sub('?', sql)
+    sql = sql.replace('%s', '?')
+    sql = _IN_LIST.sub('IN (...)', sql)
+    return _WHITESPACE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode('utf-8')).hexdigest()[:12]
+
+
+def call_site():
+    """Innermost view line on the stack, else the innermost app line"""
+    app_site = None
+    frame = sys._getframe(1)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(APP_DIR) and filename not in SKIP_FILES:
+            site = f'{os.path.relpath(filename, os.path.dirname(APP_DIR))}:{frame.f_lineno} in {frame.f_code.co_name}'
+            if filename in VIEW_FILES:
+                return site
+            app_site = app_site or site
+        frame = frame.f_back
+    return app_site or 'unknown'
+
+
+def explain(connection, sql, params):
+    """The database's plan for a SELECT, or '' where it cannot be explained"""
+    prefix = EXPLAIN_PREFIXES.get(connection.vendor)
+    if not prefix or not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return ''
+    token = _explaining.set(True)
+    try:
+        # A savepoint keeps a failed EXPLAIN from breaking the caller's transaction
+        with transaction.atomic(using=connection.alias):
+            with connection.cursor() as cursor:
+                cursor.execute(prefix + sql, params)
+                return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+    except DatabaseError as exc:
+        return f'EXPLAIN failed: {exc}'
+    finally:
+        _explaining.reset(token)
+
+
+def log_slow_queries(execute, sql, params, many, context):
+    """Database execute wrapper; installed on every connection when SLOW_QUERY_LOG is on"""
+    if _explaining.get():
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    result = execute(sql, params, many, context)
+    duration_ms = (time.perf_counter() - started) * 1000
+    if duration_ms >= settings.SLOW_QUERY_MS:
+        _record(sql, params, many, context['connection'], duration_ms)
+    return result
+
+
+def install_slow_query_log(sender, connection, **kwargs):
+    if log_slow_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(log_slow_queries)
+
+
+def _record(sql, params, many, connection, duration_ms):
+    normalized = normalize(sql)[:MAX_SQL_LENGTH]
+    key = fingerprint(normalized)
+    site = call_site()
+    plan = None
+    if settings.SLOW_QUERY_EXPLAIN and not many and key not in _explained:
+        _explained.add(key)
+        plan = explain(connection, sql, params)
+    logger.warning('Slow query (%.1f ms) at %s: %s', duration_ms, site, normalized[:500])
+    _append({
+        'at': timezone.now().isoformat(),
+        'ms': round(duration_ms, 2),
+        'fingerprint': key,
+        'sql': normalized,
+        'call_site': site,
+        'database': connection.alias,
+        'plan': plan,
+    })
+
+
+def _log_path():
+    return os.path.join(settings.SLOW_QUERY_DIR, f'{os.getpid()}.jsonl')
+
+
+def _append(entry):
+    """Append to this process's log, rotating it to `.1` past SLOW_QUERY_LOG_MAX_BYTES"""
+    path = _log_path()
+    with _write_lock:
+        os.makedirs(settings.SLOW_QUERY_DIR, exist_ok=True)
+        try:
+            if os.path.getsize(path) > settings.SLOW_QUERY_LOG_MAX_BYTES:
+                os.replace(path, f'{path}.1')
+        except FileNotFoundError:
+            pass
+        with open(path, 'a') as fh:
+            fh.write(json.dumps(entry) + '\n')
+
+
+def _entries():
+    directory = settings.SLOW_QUERY_DIR
+    if not os.path.isdir(directory):
+        return
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith(('.jsonl', '.jsonl.1')):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as fh:
+                lines = fh.readlines()
+        except FileNotFoundError:
+            continue
+        for line in lines:
+            try:
+                yield json.loads(line)
+            except ValueError:
+                continue  # partially written line
+
+
+def report():
+    """Logged slow queries grouped by fingerprint, most total time first"""
+    groups = {}
+    for entry in _entries():
+        group = groups.setdefault(entry['fingerprint'], {
+            'fingerprint': entry['fingerprint'], 'sql': entry['sql'], 'count': 0, 'total_ms': 0.0,
+            'max_ms': 0.0, 'last_seen': '', 'plan': '', 'sites': Counter(),
+        })
+        group['count'] += 1
+        group['total_ms'] += entry['ms']
+        group['max_ms'] = max(group['max_ms'], entry['ms'])
+        group['sites'][entry['call_site']] += 1
+        if entry['at'] >= group['last_seen']:
+            group['last_seen'] = entry['at']
+            group['plan'] = entry.get('plan') or group['plan']
+        elif not group['plan']:
+            group['plan'] = entry.get('plan') or ''
+    for group in groups.values():
+        group['total_ms'] = round(group['total_ms'], 1)
+        group['avg_ms'] = round(group['total_ms'] / group['count'], 1)
+        group['call_sites'] = group.pop('sites').most_common()
+    return sorted(groups.values(), key=lambda group: group['total_ms'], reverse=True)
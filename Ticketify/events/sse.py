@@ -0,0 +1,101 @@
+"""Server-Sent Events endpoint for live ticket availability (ASGI only).
+
+Served by a small raw ASGI handler in front of Django so an idle
+connection costs one coroutine and a one-slot queue, not a worker thread:
+
+    GET /sse/events/<event_id>/availability/[?show_time=<id>]
+"""
+import asyncio
+import json
+import re
+from urllib.parse import parse_qs
+
+from django.conf import settings
+
+from .services import availability_feed
+
+PATH_RE = re.compile(r'^/sse/events/(?P<event_id>\d+)/availability/$')
+
+
+def _message(payload, event='availability'):
+    return f'event: {event}\ndata: {json.dumps(payload)}\n\n'.encode('utf-8')
+
+
+async def _send_plain(send, status, body):
+    await send({'type': 'http.response.start', 'status': status, 'headers': [(b'content-type', b'text/plain')]})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _wait_for_disconnect(receive):
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return
+
+
+async def availability_stream(scope, receive, send, event_id, broker=None):
+    """Send the current counters, then an update whenever they change"""
+    broker = broker or availability_feed.broker
+    if scope['method'] != 'GET':
+        await _send_plain(send, 405, b'Method not allowed')
+        return
+    query = parse_qs(scope.get('query_string', b'').decode('latin-1'))
+    show_time = query.get('show_time', [''])[0]
+    if show_time and not show_time.isdigit():
+        await _send_plain(send, 400, b'Invalid show_time')
+        return
+    key = (event_id, int(show_time) if show_time else None)
+
+    initial = (await availability_feed.read_snapshots({key})).get(key)
+    if initial is None:
+        await _send_plain(send, 404, b'Not found')
+        return
+
+    queue = broker.subscribe(key)
+    disconnected = asyncio.ensure_future(_wait_for_disconnect(receive))
+    heartbeat = getattr(settings, 'SSE_HEARTBEAT_SECONDS', 15)
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream'),
+                (b'cache-control', b'no-cache'),
+                # Stop nginx from buffering the stream
+                (b'x-accel-buffering', b'no'),
+            ],
+        })
+        await send({'type': 'http.response.body', 'body': b'retry: 5000\n' + _message(initial), 'more_body': True})
+
+        while True:
+            update = asyncio.ensure_future(queue.get())
+            done, _ = await asyncio.wait(
+                {update, disconnected}, timeout=heartbeat, return_when=asyncio.FIRST_COMPLETED
+            )
+            if disconnected in done:
+                update.cancel()
+                break
+            if update in done:
+                body = _message(update.result())
+            else:
+                update.cancel()
+                # Comment line keeps proxies from closing an idle stream
+                body = b': keep-alive\n\n'
+            await send({'type': 'http.response.body', 'body': body, 'more_body': True})
+    finally:
+        broker.unsubscribe(key, queue)
+        disconnected.cancel()
+
+
+def sse_router(application):
+    """Wrap the Django ASGI application, answering SSE paths directly"""
+
+    async def router(scope, receive, send):
+        if scope['type'] == 'http':
+            match = PATH_RE.match(scope['path'])
+            if match:
+                await availability_stream(scope, receive, send, int(match.group('event_id')))
+                return
+        await application(scope, receive, send)
+
+    return router
@@ -0,0 +1,150 @@
+"""Query-count and timing budgets for every page and API endpoint.
+
+The data set is seeded once per class at realistic volumes, so a template
+or view change that adds a query per row (e.g. a lazy `ticket.event` in
+`my_tickets.html`) blows the budget instead of going unnoticed with the
+handful of rows the functional tests use.
+
+Run with: python manage.py test events.tests_performance
+"""
+import time as time_module
+import uuid
+from datetime import time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from events.models import Booking, Category, Event, Review, Ticket, TicketScanLog, UserProfile
+
+EVENTS = 2000
+BUYERS = 50
+BOOKINGS_PER_BUYER = 30
+TICKETS_PER_BOOKING = 2
+REVIEWS_PER_EVENT = 25
+
+# Wall-clock budget per request; generous enough for slow CI machines
+TIME_BUDGET_SECONDS = 1.0
+
+
+def _booking_id():
+    return f'BK{uuid.uuid4().hex[:12].upper()}'
+
+
+def _ticket_id():
+    return f'TK{uuid.uuid4().hex[:12].upper()}'
+
+
+@override_settings(
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+    CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'perf'}},
+)
+class ViewQueryBudgetTestCase(TestCase):
+    """Maximum query counts and response times per view at realistic volume"""
+
+    @classmethod
+    def setUpTestData(cls):
+        password = make_password('testpass123')
+        today = timezone.localdate()
+
+        cls.organizer = User.objects.create(username='organizer', password=password)
+        UserProfile.objects.filter(user=cls.organizer).update(is_organizer=True)
+        buyers = User.objects.bulk_create(
+            User(username=f'buyer{i}', email=f'buyer{i}@example.com', password=password) for i in range(BUYERS)
+        )
+        UserProfile.objects.bulk_create(UserProfile(user=user) for user in buyers)
+        cls.buyer = buyers[0]
+
+        categories = Category.objects.bulk_create(Category(name=f'Category {i}') for i in range(8))
+        Event.objects.bulk_create(
+            Event(
+                title=f'Event {i}', slug=f'event-{i}', description='Seeded event',
+                category=categories[i % len(categories)], organizer=cls.organizer,
+                venue='Main Hall', address='1 Test St', city='Test City',
+                event_date=today + timedelta(days=i % 90), start_time=time(18 + i % 4, 0),
+                starts_at=Event.compute_starts_at(today + timedelta(days=i % 90), time(18 + i % 4, 0)),
+                price=Decimal('25.00'), total_tickets=500, available_tickets=400,
+                status='published', is_featured=i % 40 == 0,
+            )
+            for i in range(EVENTS)
+        )
+        events = list(Event.objects.order_by('id'))
+        cls.event = events[0]
+
+        bookings = Booking.objects.bulk_create(
+            Booking(
+                booking_id=_booking_id(), user=buyer, event=events[(b * 7 + n) % len(events)],
+                quantity=TICKETS_PER_BOOKING, total_amount=Decimal('50.00'),
+                email=buyer.email, phone='555-0100', status='confirmed',
+            )
+            for b, buyer in enumerate(buyers) for n in range(BOOKINGS_PER_BUYER)
+        )
+        tickets = Ticket.objects.bulk_create(
+            Ticket(
+                ticket_id=_ticket_id(), verification_code=uuid.uuid4().hex, booking=booking,
+                event_id=booking.event_id, user_id=booking.user_id,
+                attendee_name=booking.user.username, attendee_email=booking.email,
+            )
+            for booking in bookings for _ in range(TICKETS_PER_BOOKING)
+        )
+        cls.booking = bookings[0]
+        cls.ticket = tickets[0]
+        TicketScanLog.objects.bulk_create(
+            TicketScanLog(ticket=ticket, success=True, notes='Validated') for ticket in tickets[:500]
+        )
+        Review.objects.bulk_create(
+            Review(event=event, user=buyer, rating=1 + (e + u) % 5, comment='Seeded review')
+            for e, event in enumerate(events[:40]) for u, buyer in enumerate(buyers[:REVIEWS_PER_EVENT])
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def assertBudget(self, url, queries, user=None, status=200):
+        """GET `url` with exactly `queries` queries within the time budget"""
+        if user is not None:
+            self.client.force_login(user)
+        started = time_module.perf_counter()
+        with self.assertNumQueries(queries):
+            response = self.client.get(url)
+        elapsed = time_module.perf_counter() - started
+        self.assertEqual(response.status_code, status)
+        self.assertLess(elapsed, TIME_BUDGET_SECONDS, f'{url} took {elapsed:.2f}s')
+        return response
+
+    # Logged-in pages spend two queries loading the session and the user
+
+    def test_public_pages(self):
+        detail = reverse('event_detail', kwargs={'slug': self.event.slug})
+        self.assertBudget(reverse('home'), 5)
+        self.assertBudget(reverse('events_list'), 3)
+        self.assertBudget(reverse('events_list') + '?sort=popular', 3)
+        self.assertBudget(reverse('events_list') + f'?category={self.event.category_id}&date=upcoming', 3)
+        self.assertBudget(detail, 4)
+        self.assertBudget(reverse('categories'), 1)
+        # Logged in: own review and ticket ownership checks
+        self.assertBudget(detail, 8, user=self.buyer)
+
+    def test_buyer_pages(self):
+        self.assertBudget(reverse('my_bookings'), 4, user=self.buyer)
+        self.assertBudget(reverse('my_tickets'), 4, user=self.buyer)
+        self.assertBudget(reverse('ticket_detail', kwargs={'ticket_id': self.ticket.ticket_id}), 5, user=self.buyer)
+        self.assertBudget(reverse('booking_confirmation', kwargs={'booking_id': self.booking.booking_id}), 5, user=self.buyer)
+        self.assertBudget(reverse('book_ticket', kwargs={'slug': self.event.slug}), 3, user=self.buyer)
+
+    def test_organizer_pages(self):
+        self.assertBudget(reverse('organizer_dashboard'), 7, user=self.organizer)
+        self.assertBudget(reverse('event_bookings', kwargs={'slug': self.event.slug}), 7, user=self.organizer)
+        self.assertBudget(reverse('validate_ticket', kwargs={'slug': self.event.slug}), 3, user=self.organizer)
+        self.assertBudget(reverse('edit_event', kwargs={'slug': self.event.slug}), 5, user=self.organizer)
+
+    def test_api_endpoints(self):
+        self.assertBudget(reverse('api_event_list'), 2)
+        self.assertBudget(reverse('api_event_list') + '?fields=slug,title,category', 2)
+        self.assertBudget(reverse('api_event_detail', kwargs={'slug': self.event.slug}), 1)
+        self.assertBudget(reverse('api_organizer_sales'), 3, user=self.organizer)
+        self.assertBudget(reverse('api_event_sales', kwargs={'slug': self.event.slug}), 4, user=self.organizer)
@@ -1,6 +1,16 @@
+from django.conf import settings
 from django.urls import path
-from . import views
-from .api_views import QRValidateAPIView, QRGenerateAPIView
+from . import async_api_views, views
+from .api_views import (QRValidateAPIView, QRGenerateAPIView, OrganizerSalesAPIView,
+                        EventListAPIView, EventDetailAPIView)
+
+# Gate scanners hit the QR API hardest; serve it from async views under ASGI
+if settings.QR_API_ASYNC:
+    qr_validate_view = async_api_views.qr_validate
+    qr_generate_view = async_api_views.qr_generate
+else:
+    qr_validate_view = QRValidateAPIView.as_view()
+    qr_generate_view = QRGenerateAPIView.as_view()
 
 urlpatterns = [
     # Public URLs
@@ -18,7 +28,11 @@ urlpatterns = [
     
     # Booking URLs
     path('events/<slug:slug>/book/', views.book_ticket_view, name='book_ticket'),
+    path('events/<slug:slug>/seats/', views.seat_availability_view, name='seat_availability'),
+    path('events/<slug:slug>/waiting-room/', views.waiting_room_view, name='waiting_room'),
+    path('waiting-room/<int:event_id>/status/', views.waiting_room_status_view, name='waiting_room_status'),
     path('booking/<str:booking_id>/', views.booking_confirmation_view, name='booking_confirmation'),
+    path('booking/<str:booking_id>/checkout/', views.booking_checkout_view, name='booking_checkout'),
     path('my-bookings/', views.my_bookings_view, name='my_bookings'),
     path('my-tickets/', views.my_tickets_view, name='my_tickets'),
     path('ticket/<str:ticket_id>/', views.ticket_detail_view, name='ticket_detail'),
@@ -30,10 +44,23 @@ urlpatterns = [
     path('organizer/event/<slug:slug>/delete/', views.delete_event_view, name='delete_event'),
     path('organizer/event/<slug:slug>/bookings/', views.event_bookings_view, name='event_bookings'),
     path('organizer/event/<slug:slug>/validate/', views.validate_ticket_view, name='validate_ticket'),
+    path('organizer/exports/<int:job_id>/download/', views.export_download_view, name='export_download'),
+    
+    # Prometheus scrape endpoint
+    path('metrics', views.metrics_view, name='metrics'),
+    
+    # Staff URLs
+    path('staff/slow-requests/', views.slow_requests_view, name='slow_requests'),
+    path('staff/slow-requests/<str:sample_id>/', views.slow_request_detail_view, name='slow_request_detail'),
+    path('staff/slow-queries/', views.slow_queries_view, name='slow_queries'),
     
     # Review URLs
     path('events/<slug:slug>/review/', views.add_review_view, name='add_review'),
     # API endpoints
-    path('api/qr/validate/', QRValidateAPIView.as_view(), name='api_qr_validate'),
-    path('api/qr/generate/<str:ticket_id>/', QRGenerateAPIView.as_view(), name='api_qr_generate'),
+    path('api/qr/validate/', qr_validate_view, name='api_qr_validate'),
+    path('api/qr/generate/<str:ticket_id>/', qr_generate_view, name='api_qr_generate'),
+    path('api/events/', EventListAPIView.as_view(), name='api_event_list'),
+    path('api/events/<slug:slug>/', EventDetailAPIView.as_view(), name='api_event_detail'),
+    path('api/organizer/sales/', OrganizerSalesAPIView.as_view(), name='api_organizer_sales'),
+    path('api/organizer/events/<slug:slug>/sales/', OrganizerSalesAPIView.as_view(), name='api_event_sales'),
 ]
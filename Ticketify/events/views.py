@@ -1,17 +1,27 @@
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth import login, authenticate, logout
 from django.contrib.auth.decorators import login_required
+from django.contrib.admin.views.decorators import staff_member_required
+from django.conf import settings
 from django.contrib import messages
-from django.db.models import Q, Count, Avg
+from django.db import transaction
+from django.db.models import Avg, Count, Sum
 from django.utils import timezone
-from django.http import JsonResponse, HttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, HttpResponse, Http404
 from django.core.paginator import Paginator
 from django.views.decorators.http import require_POST
-from .models import Event, Category, Booking, Ticket, Review, UserProfile, MovieShowTime
+from .models import Event, Category, Booking, Ticket, TicketScanLog, Review, UserProfile, MovieShowTime, ExportJob
 from .forms import (UserRegistrationForm, UserLoginForm, EventForm, 
                     BookingForm, ReviewForm, QRCodeValidationForm)
+from .db_routing import replica_reads
+from . import metrics, profiling, slow_queries
+from .page_cache import cache_anonymous_page, event_scope
+from .services import analytics_service, catalogue_service, export_service, hold_service, idempotency_service, inventory_service, seat_service, waiting_room_service, write_queue
 from datetime import datetime, timedelta
+import hmac
 import json
+import uuid
 
 
 # ============= Authentication Views =============
@@ -66,18 +76,17 @@ def logout_view(request):
 
 # ============= Public Views =============
 
+@replica_reads
 def home_view(request):
     """Homepage with featured events"""
     featured_events = Event.objects.filter(
         status='published',
         is_featured=True,
-        event_date__gte=timezone.now().date()
-    )[:6]
+    ).not_past().select_related('category')[:6]
     
     upcoming_events = Event.objects.filter(
         status='published',
-        event_date__gte=timezone.now().date()
-    ).order_by('event_date', 'start_time')[:8]
+    ).not_past().select_related('category').order_by('event_date', 'start_time')[:8]
     
     categories = Category.objects.all()[:6]
     
@@ -96,71 +105,19 @@ def home_view(request):
     return render(request, 'events/home.html', context)
 
 
+@replica_reads
+@cache_anonymous_page
 def events_list_view(request):
     """List all events with filtering and search"""
-    events = Event.objects.filter(status='published')
-    
-    # Search - Enhanced to include category names
+    events = catalogue_service.filter_events(Event.objects.filter(status='published').select_related('category'), request.GET)
     search_query = request.GET.get('search', '')
-    if search_query:
-        events = events.filter(
-            Q(title__icontains=search_query) |
-            Q(description__icontains=search_query) |
-            Q(city__icontains=search_query) |
-            Q(venue__icontains=search_query) |
-            Q(category__name__icontains=search_query)
-        )
-    
-    # Category filter
     category_id = request.GET.get('category', '')
-    if category_id:
-        events = events.filter(category_id=category_id)
-    
-    # Date filter - Default to 'upcoming' for better UX
     date_filter = request.GET.get('date', '')
-    if not date_filter or date_filter == 'all':
-        # Show all events (past and future)
-        pass
-    elif date_filter == 'upcoming':
-        events = events.filter(event_date__gte=timezone.now().date())
-    elif date_filter == 'today':
-        today = timezone.now().date()
-        tomorrow = today + timedelta(days=1)
-        events = events.filter(event_date__gte=today, event_date__lt=tomorrow)
-    elif date_filter == 'tomorrow':
-        tomorrow = timezone.now().date() + timedelta(days=1)
-        day_after = tomorrow + timedelta(days=1)
-        events = events.filter(event_date__gte=tomorrow, event_date__lt=day_after)
-    elif date_filter == 'weekend':
-        today = timezone.now().date()
-        # Calculate next Saturday and Sunday
-        days_until_saturday = (5 - today.weekday()) % 7
-        if days_until_saturday == 0 and today.weekday() == 5:  # Today is Saturday
-            weekend_start = today
-        elif today.weekday() == 6:  # Today is Sunday
-            weekend_start = today - timedelta(days=1)
-        else:
-            weekend_start = today + timedelta(days=days_until_saturday)
-        weekend_end = weekend_start + timedelta(days=2)
-        events = events.filter(event_date__gte=weekend_start, event_date__lt=weekend_end)
-    
-    # Price filter
     price_filter = request.GET.get('price', '')
-    if price_filter == 'free':
-        events = events.filter(price=0)
-    elif price_filter == 'paid':
-        events = events.filter(price__gt=0)
     
     # Sorting
     sort_by = request.GET.get('sort', 'date')
-    if sort_by == 'date':
-        events = events.order_by('event_date', 'start_time')
-    elif sort_by == 'price_low':
-        events = events.order_by('price')
-    elif sort_by == 'price_high':
-        events = events.order_by('-price')
-    elif sort_by == 'popular':
-        events = events.annotate(booking_count=Count('bookings')).order_by('-booking_count')
+    events = catalogue_service.sort_events(events, catalogue_service.sort_key(request.GET))
     
     # Pagination
     paginator = Paginator(events, 12)
@@ -188,12 +145,16 @@ def events_list_view(request):
     return render(request, 'events/events_list.html', context)
 
 
+@replica_reads
+@cache_anonymous_page(scope=event_scope)
 def event_detail_view(request, slug):
     """Detailed view of a single event"""
-    event = get_object_or_404(Event, slug=slug, status='published')
+    event = get_object_or_404(Event.objects.select_related('category', 'organizer'), slug=slug, status='published')
+    # Sharded events: the row's totals are refreshed periodically; show the live sums
+    inventory_service.load_counters(event)
     
     # Get reviews
-    reviews = event.reviews.all()
+    reviews = event.reviews.select_related('user')
     average_rating = reviews.aggregate(avg_rating=Avg('rating'))['avg_rating'] or 0
     
     # Check if user has already reviewed
@@ -213,7 +174,7 @@ def event_detail_view(request, slug):
     similar_events = Event.objects.filter(
         category=event.category,
         status='published'
-    ).exclude(id=event.id)[:4]
+    ).select_related('category').exclude(id=event.id)[:4]
     
     context = {
         'event': event,
@@ -232,82 +193,161 @@ def book_ticket_view(request, slug):
     """Book tickets for an event"""
     event = get_object_or_404(Event, slug=slug, status='published')
     
-    # Create default show times for movie events if they don't exist
-    if event.event_type == 'movie':
-        event.create_default_show_times()
+    # A resubmitted form (double click, mobile retry) gets the original booking back
+    idempotency_scope = f'booking:{request.user.pk}'
+    idempotency_key = None
+    if request.method == 'POST':
+        idempotency_key = idempotency_service.clean_key(
+            request.headers.get('Idempotency-Key') or request.POST.get('idempotency_key')
+        )
+        previous = idempotency_key and idempotency_service.lookup(idempotency_scope, idempotency_key)
+        if previous:
+            return _replay_booking(request, previous)
     
+    inventory_service.load_counters(event)
     if event.is_sold_out:
         messages.error(request, 'Sorry, this event is sold out.')
         return redirect('event_detail', slug=slug)
     
+    # High-demand on-sales: only buyers admitted from the waiting room get the form
+    room = waiting_room_service.room_state(event)
+    if room:
+        token = request.COOKIES.get(waiting_room_service.cookie_name(event.id))
+        ticket = waiting_room_service.read_token(room, token, request.user.pk)
+        if ticket is None or not waiting_room_service.status(room, ticket)['admitted']:
+            return redirect('waiting_room', slug=slug)
+    
     if request.method == 'POST':
         form = BookingForm(event, request.POST)
         if form.is_valid():
-            booking = form.save(commit=False)
-            booking.user = request.user
-            booking.event = event
-
-            # Save selected seats list if provided
-            selected_seats_raw = form.cleaned_data.get('selected_seats', '')
-            selected_seats = []
-            if selected_seats_raw:
-                selected_seats = [s.strip() for s in selected_seats_raw.split(',') if s.strip()]
-                booking.selected_seats = selected_seats
-
-            # Associate show_time if provided (for movies)
-            show_time = form.cleaned_data.get('show_time')
-            if show_time:
-                booking.show_time = show_time
-
-            # Create booking as PENDING first to avoid signal auto-creation
-            booking.status = 'pending'
-            booking.save()
-
-            # Decrease availability and create tickets
-            qty = booking.quantity
-            if event.event_type == 'movie':
-                if show_time:
-                    show_time.available_tickets = max(0, show_time.available_tickets - qty)
-                    show_time.save()
+            previous = idempotency_key and idempotency_service.claim(idempotency_scope, idempotency_key)
+            if previous:
+                return _replay_booking(request, previous)
+            try:
+                booking = write_queue.run(_create_booking, request, event, form)
+            except (seat_service.SeatUnavailable, inventory_service.InventoryUnavailable) as exc:
+                field = 'selected_seats' if isinstance(exc, seat_service.SeatUnavailable) else 'quantity'
+                form.add_error(field, str(exc))
+            except write_queue.WriteCancelled:
+                messages.error(request, 'We are handling a lot of bookings right now. Please try again.')
+            except write_queue.WriteTimeout:
+                # The queued write may still commit: keep the key claimed so a
+                # retry cannot book a second time
+                messages.warning(request, 'Your booking is still being processed. Please check My Bookings in a moment.')
+                return redirect('my_bookings')
+            except Exception:
+                if idempotency_key:
+                    idempotency_service.release(idempotency_scope, idempotency_key)
+                raise
             else:
-                event.available_tickets = max(0, event.available_tickets - qty)
-                event.save()
-
-            # Create ticket records
-            seats_iter = iter(selected_seats)
-            for i in range(qty):
-                seat = next(seats_iter, None)
-                Ticket.objects.create(
-                    booking=booking,
-                    event=event,
-                    user=request.user,
-                    attendee_name=request.user.get_full_name() or request.user.username,
-                    attendee_email=booking.email,
-                    seat_number=seat
-                )
-
-            # Finally mark booking as confirmed (signal won't recreate tickets because created=False)
-            booking.status = 'confirmed'
-            booking.save(update_fields=['status'])
-
-            messages.success(request, f'Booking confirmed! Booking ID: {booking.booking_id}')
-            return redirect('booking_confirmation', booking_id=booking.booking_id)
+                if idempotency_key:
+                    idempotency_service.store(idempotency_scope, idempotency_key, booking.booking_id)
+                if booking.status == 'pending':
+                    return redirect('booking_checkout', booking_id=booking.booking_id)
+                messages.success(request, f'Booking confirmed! Booking ID: {booking.booking_id}')
+                return redirect('booking_confirmation', booking_id=booking.booking_id)
+            if idempotency_key:
+                idempotency_service.release(idempotency_scope, idempotency_key)
     else:
         # Pre-fill with user data
         initial_data = {
             'email': request.user.email,
-            'phone': request.user.profile.phone if hasattr(request.user, 'profile') else ''
+            'phone': UserProfile.objects.for_user(request.user).phone or '',
+            'idempotency_key': uuid.uuid4().hex,
         }
         form = BookingForm(event, initial=initial_data)
     
+    # Per-row seat availability for assigned-seating events (movies load it per show time)
+    seat_availability = None
+    if event.seat_map_id and event.event_type != 'movie':
+        seat_availability = seat_service.availability(event)
+    
     context = {
         'event': event,
         'form': form,
+        'seat_availability': seat_availability,
     }
     
     return render(request, 'events/book_ticket.html', context)
 
 
+def _replay_booking(request, booking_id):
+    """Answer a repeated booking submission with the booking it already made"""
+    if booking_id == idempotency_service.PENDING:
+        messages.info(request, 'Your booking is already being processed.')
+        return redirect('my_bookings')
+    booking = get_object_or_404(Booking, booking_id=booking_id, user=request.user)
+    if booking.status == 'pending':
+        return redirect('booking_checkout', booking_id=booking.booking_id)
+    return redirect('booking_confirmation', booking_id=booking.booking_id)
+
+
+@login_required
+def waiting_room_view(request, slug):
+    """Queue page shown before the booking form while an on-sale is busy"""
+    event = get_object_or_404(Event, slug=slug, status='published')
+    room = waiting_room_service.room_state(event)
+    if not room:
+        return redirect('book_ticket', slug=slug)
+    
+    cookie = waiting_room_service.cookie_name(event.id)
+    token = request.COOKIES.get(cookie)
+    ticket = waiting_room_service.read_token(room, token, request.user.pk)
+    queue_status = waiting_room_service.status(room, ticket) if ticket else None
+    issued = queue_status is None or queue_status['expired']
+    if issued:
+        token = waiting_room_service.join(room, request.user)
+        ticket = waiting_room_service.read_token(room, token)
+        queue_status = waiting_room_service.status(room, ticket)
+    
+    if queue_status['admitted']:
+        response = redirect('book_ticket', slug=slug)
+    else:
+        response = render(request, 'events/waiting_room.html', {'event': event, 'queue': queue_status})
+    if issued:
+        response.set_cookie(cookie, token, max_age=24 * 3600, httponly=True, samesite='Lax')
+    return response
+
+
+def waiting_room_status_view(request, event_id):
+    """Queue position (JSON) for polling; served from the token and cache only"""
+    room = waiting_room_service.cached_room_state(event_id)
+    if not room:
+        return JsonResponse({'admitted': True, 'closed': True})
+    ticket = waiting_room_service.read_token(room, request.COOKIES.get(waiting_room_service.cookie_name(event_id)))
+    if ticket is None:
+        return JsonResponse({'detail': 'Not in the queue.'}, status=404)
+    return JsonResponse(waiting_room_service.status(room, ticket))
+
+
+@transaction.atomic
+def _create_booking(request, event, form):
+    """Hold tickets (and seats) for the buyer, then confirm straight away
+    unless the site runs a separate checkout step"""
+    booking = form.save(commit=False)
+    booking.user = request.user
+    booking.event = event
+    booking.show_time = form.cleaned_data.get('show_time')
+    booking.selected_seats = form.cleaned_data.get('selected_seats') or None
+
+    hold_service.place_hold(booking, form.cleaned_data.get('seat_zone') or None)
+    if not settings.BOOKING_REQUIRE_CHECKOUT:
+        hold_service.confirm_booking(booking)
+    return booking
+
+
+def seat_availability_view(request, slug):
+    """Seat map availability (JSON) for an event or one of its show times"""
+    event = get_object_or_404(Event.objects.select_related('seat_map'), slug=slug, status='published')
+    if not event.seat_map_id:
+        return JsonResponse({'detail': 'This event does not have assigned seating.'}, status=404)
+
+    show_time = None
+    if request.GET.get('show_time'):
+        show_time = get_object_or_404(MovieShowTime, pk=request.GET['show_time'], event=event)
+    return JsonResponse(seat_service.availability(event, show_time))
+
+
 @login_required
 def booking_confirmation_view(request, booking_id):
     """Booking confirmation page"""
@@ -322,10 +362,40 @@ def booking_confirmation_view(request, booking_id):
     return render(request, 'events/booking_confirmation.html', context)
 
 
+@login_required
+def booking_checkout_view(request, booking_id):
+    """Review a held booking and confirm it before the hold expires"""
+    booking = get_object_or_404(
+        Booking.objects.select_related('event', 'show_time'), booking_id=booking_id, user=request.user
+    )
+    if booking.status != 'pending':
+        return redirect('booking_confirmation', booking_id=booking.booking_id)
+    
+    if request.method == 'POST':
+        if request.POST.get('action') == 'release':
+            hold_service.release_hold(booking)
+            messages.info(request, 'Your reservation has been released.')
+            return redirect('event_detail', slug=booking.event.slug)
+        try:
+            hold_service.confirm_booking(booking)
+        except (hold_service.HoldExpired, inventory_service.InventoryUnavailable) as exc:
+            messages.error(request, str(exc))
+            return redirect('event_detail', slug=booking.event.slug)
+        messages.success(request, f'Booking confirmed! Booking ID: {booking.booking_id}')
+        return redirect('booking_confirmation', booking_id=booking.booking_id)
+    
+    context = {
+        'booking': booking,
+        'hold_active': booking.is_hold_active,
+    }
+    
+    return render(request, 'events/booking_checkout.html', context)
+
+
 @login_required
 def my_bookings_view(request):
     """View user's bookings"""
-    bookings = Booking.objects.filter(user=request.user).order_by('-created_at')
+    bookings = Booking.objects.filter(user=request.user).select_related('event', 'show_time').order_by('-created_at')
     
     paginator = Paginator(bookings, 10)
     page_number = request.GET.get('page', 1)
@@ -341,7 +411,12 @@ def my_bookings_view(request):
 @login_required
 def my_tickets_view(request):
     """View user's tickets"""
-    tickets = Ticket.objects.filter(user=request.user).order_by('-created_at')
+    tickets = (
+        Ticket.objects.filter(user=request.user)
+        .select_related('event', 'booking__show_time')
+        .with_event_time_status()
+        .order_by('-created_at')
+    )
     
     paginator = Paginator(tickets, 10)
     page_number = request.GET.get('page', 1)
@@ -372,7 +447,7 @@ def ticket_detail_view(request, ticket_id):
 @login_required
 def organizer_dashboard_view(request):
     """Organizer dashboard"""
-    if not hasattr(request.user, 'profile') or not request.user.profile.is_organizer:
+    if not UserProfile.objects.for_user(request.user).is_organizer:
         messages.error(request, 'You need to be registered as an organizer.')
         return redirect('home')
     
@@ -381,21 +456,17 @@ def organizer_dashboard_view(request):
     # Statistics
     total_events = events.count()
     published_events = events.filter(status='published').count()
-    total_bookings = Booking.objects.filter(
+    confirmed = Booking.objects.filter(
         event__organizer=request.user,
         status='confirmed'
-    ).count()
-    total_revenue = sum([
-        booking.total_amount for booking in Booking.objects.filter(
-            event__organizer=request.user,
-            status='confirmed'
-        )
-    ])
+    ).aggregate(count=Count('id'), revenue=Sum('total_amount'))
+    total_bookings = confirmed['count']
+    total_revenue = confirmed['revenue'] or 0
     
-    recent_events = events[:5]
+    recent_events = events.select_related('category')[:5]
     recent_bookings = Booking.objects.filter(
         event__organizer=request.user
-    ).order_by('-created_at')[:10]
+    ).select_related('user', 'event').order_by('-created_at')[:10]
     
     context = {
         'total_events': total_events,
@@ -412,7 +483,7 @@ def organizer_dashboard_view(request):
 @login_required
 def create_event_view(request):
     """Create new event"""
-    if not hasattr(request.user, 'profile') or not request.user.profile.is_organizer:
+    if not UserProfile.objects.for_user(request.user).is_organizer:
         messages.error(request, 'You need to be registered as an organizer.')
         return redirect('home')
     
@@ -479,11 +550,17 @@ def delete_event_view(request, slug):
 def event_bookings_view(request, slug):
     """View bookings for a specific event"""
     event = get_object_or_404(Event, slug=slug, organizer=request.user)
-    bookings = event.bookings.all().order_by('-created_at')
+
+    export_format = request.GET.get('export', '')
+    if export_format in export_service.WRITERS:
+        return _export_attendees(request, event, export_format)
+
+    bookings = event.bookings.select_related('user').order_by('-created_at')
     
     # Statistics
-    total_bookings = bookings.filter(status='confirmed').count()
-    total_revenue = sum([b.total_amount for b in bookings.filter(status='confirmed')])
+    confirmed = bookings.filter(status='confirmed').aggregate(count=Count('id'), revenue=Sum('total_amount'))
+    total_bookings = confirmed['count']
+    total_revenue = confirmed['revenue'] or 0
     tickets_sold = event.tickets_sold
     
     paginator = Paginator(bookings, 20)
@@ -496,11 +573,42 @@ def event_bookings_view(request, slug):
         'total_bookings': total_bookings,
         'total_revenue': total_revenue,
         'tickets_sold': tickets_sold,
+        'export_jobs': event.export_jobs.filter(requested_by=request.user)[:5],
     }
     
     return render(request, 'events/event_bookings.html', context)
 
 
+def _export_attendees(request, event, export_format):
+    """Stream an attendee export, or hand large ones to a background job"""
+    if request.GET.get('background') or export_service.should_run_in_background(event):
+        export_service.start_export_job(event, request.user, export_format)
+        messages.info(request, 'Your export is being prepared. It will be listed below when ready.')
+        return redirect('event_bookings', slug=event.slug)
+
+    asynchronous = isinstance(request, ASGIRequest)
+    if export_format == 'csv':
+        return export_service.stream_csv_response(event, asynchronous)
+
+    try:
+        return export_service.xlsx_response(event, asynchronous)
+    except export_service.ExportUnavailable as exc:
+        messages.error(request, str(exc))
+        return redirect('event_bookings', slug=event.slug)
+
+
+@login_required
+def export_download_view(request, job_id):
+    """Download the file produced by a finished export job"""
+    job = get_object_or_404(ExportJob, pk=job_id, requested_by=request.user, status='done')
+    return export_service.file_response(
+        job.file.open('rb'),
+        export_service.export_filename(job.event, job.file_format),
+        export_service.CONTENT_TYPES[job.file_format],
+        asynchronous=isinstance(request, ASGIRequest),
+    )
+
+
 # ============= QR Code Validation Views =============
 
 @login_required
@@ -524,7 +632,7 @@ def validate_ticket_view(request, slug):
                 elif ticket.status == 'cancelled':
                     messages.error(request, f'Ticket {ticket.ticket_id} has been cancelled.')
                 elif ticket.status == 'valid':
-                    ticket.mark_as_used(request.user)
+                    write_queue.run(_record_gate_scan, ticket, request.user)
                     messages.success(request, f'✓ Ticket {ticket.ticket_id} validated successfully! Attendee: {ticket.attendee_name}')
                 
                 context = {
@@ -547,6 +655,15 @@ def validate_ticket_view(request, slug):
     return render(request, 'events/validate_ticket.html', context)
 
 
+@transaction.atomic
+def _record_gate_scan(ticket, user):
+    """Mark a ticket used at the gate and log the scan (which the rollups count)"""
+    ticket.mark_as_used(user)
+    TicketScanLog.objects.create(
+        ticket=ticket, success=True, device_info=f'Manual validation by {user.username}', notes='Validated'
+    )
+
+
 # ============= Review Views =============
 
 @login_required
@@ -595,11 +712,60 @@ def add_review_view(request, slug):
     return render(request, 'events/add_review.html', context)
 
 
+# ============= Staff Views =============
+
+@staff_member_required
+def slow_requests_view(request):
+    """Slow requests captured by the profiling middleware, newest first"""
+    context = {
+        'samples': profiling.slow_requests(),
+        'profiling_enabled': settings.REQUEST_PROFILING,
+        'threshold_ms': settings.SLOW_REQUEST_MS,
+    }
+    return render(request, 'events/slow_requests.html', context)
+
+
+@staff_member_required
+def slow_request_detail_view(request, sample_id):
+    """Queries and cProfile output of one slow request"""
+    sample = profiling.get_slow_request(sample_id)
+    if sample is None:
+        raise Http404('Slow request sample not found')
+    return render(request, 'events/slow_request_detail.html', {'sample': sample})
+
+
+@staff_member_required
+def slow_queries_view(request):
+    """Logged slow queries grouped by fingerprint, with call sites and plans"""
+    context = {
+        'queries': slow_queries.report(),
+        'logging_enabled': settings.SLOW_QUERY_LOG,
+        'threshold_ms': settings.SLOW_QUERY_MS,
+    }
+    return render(request, 'events/slow_queries.html', context)
+
+
 # ============= Utility Views =============
 
+def metrics_view(request):
+    """Prometheus scrape endpoint"""
+    if not settings.METRICS_ENABLED:
+        raise Http404('Metrics are disabled')
+    if settings.METRICS_TOKEN:
+        expected = f'Bearer {settings.METRICS_TOKEN}'
+        if not hmac.compare_digest(request.headers.get('Authorization', '').encode(), expected.encode()):
+            return HttpResponse('Unauthorized', status=401, content_type='text/plain')
+    elif not (settings.DEBUG or request.user.is_staff):
+        # Without a token only staff sessions may read the numbers outside development
+        return HttpResponse('Forbidden', status=403, content_type='text/plain')
+    return HttpResponse(metrics.registry.exposition(), content_type=metrics.CONTENT_TYPE)
+
+
+@replica_reads
+@cache_anonymous_page
 def categories_view(request):
     """View all categories"""
-    categories = Category.objects.all()
+    categories = Category.objects.annotate(event_count=Count('events'))
     
     context = {
         'categories': categories,
@@ -608,11 +774,13 @@ def categories_view(request):
     return render(request, 'events/categories.html', context)
 
 
+@cache_anonymous_page
 def about_view(request):
     """About page"""
     return render(request, 'events/about.html')
 
 
+@cache_anonymous_page
 def contact_view(request):
     """Contact page"""
     return render(request, 'events/contact.html')
@@ -12,5 +12,12 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'ticketify_project.settings')
+# Use the async QR API views when served over ASGI
+os.environ.setdefault('QR_API_ASYNC', '1')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+# Live availability streams (Server-Sent Events) are answered before Django
+from events.sse import sse_router  # noqa: E402  (needs the app registry loaded above)
+
+application = sse_router(django_application)